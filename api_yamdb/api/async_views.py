@@ -0,0 +1,62 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.urls import URLPattern
+from rest_framework.permissions import SAFE_METHODS
+
+from .concurrency import run_sync
+
+ASYNC_ACTIONS = {'list', 'retrieve'}
+
+
+def render_view(view, request, *args, **kwargs):
+    """Вызывает view DRF и отрисовывает ответ в том же потоке.
+
+    Готовый HttpResponse не требует от обработчика ASGI перехода в поток
+    для render()."""
+    response = view(request, *args, **kwargs)
+    if not callable(getattr(response, 'render', None)):
+        return response
+    response.render()
+    rendered = HttpResponse(
+        response.content, status=response.status_code,
+        reason=response.reason_phrase
+    )
+    for header, value in response.items():
+        rendered[header] = value
+    rendered.cookies = response.cookies
+    return rendered
+
+
+def async_view(view):
+    """Асинхронный вариант view DRF.
+
+    Безопасные запросы выполняются в пуле ASYNC_DB_WORKERS потоков, не
+    занимая поток на время ожидания в очереди; запись - через
+    sync_to_async, как синхронные view под ASGI."""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            return await run_sync(render_view, view, request, *args, **kwargs)
+        return await sync_to_async(render_view)(
+            view, request, *args, **kwargs
+        )
+    return wrapper
+
+
+def async_routes(urlpatterns, viewsets):
+    """Копия маршрутов DefaultRouter с асинхронными list и retrieve
+    указанных viewsets."""
+    routes = []
+    for pattern in urlpatterns:
+        callback = pattern.callback
+        actions = getattr(callback, 'actions', None) or {}
+        if (getattr(callback, 'cls', None) in viewsets
+                and ASYNC_ACTIONS.intersection(actions.values())):
+            pattern = URLPattern(
+                pattern.pattern, async_view(callback),
+                pattern.default_args, pattern.name
+            )
+        routes.append(pattern)
+    return routes
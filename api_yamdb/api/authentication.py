@@ -0,0 +1,73 @@
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed, InvalidToken
+)
+from rest_framework_simplejwt.settings import api_settings
+
+from reviews.models import User
+
+from .cache import get_cache, is_shared_cache
+
+USER_STATE_KEY = 'api:auth:user:{}'
+USER_STATE_FIELDS = ('id', 'username', 'role', 'is_superuser', 'is_active')
+
+
+def get_user_state(user_id):
+    """Поля пользователя для проверки прав: из кэша или одним запросом.
+
+    Кэш в памяти процесса не видит сброса из других воркеров, поэтому
+    без общего кэша состояние читается из базы на каждый запрос."""
+    queryset = User.objects.filter(pk=user_id).values(*USER_STATE_FIELDS)
+    if not is_shared_cache():
+        return queryset.first()
+    cache = get_cache()
+    key = USER_STATE_KEY.format(user_id)
+    state = cache.get(key)
+    if state is None:
+        state = queryset.first()
+        if state is not None:
+            cache.set(key, state, settings.AUTH_USER_CACHE_TIMEOUT)
+    return state
+
+
+def invalidate_user_state(user_id):
+    key = USER_STATE_KEY.format(user_id)
+    get_cache().delete(key)
+    transaction.on_commit(lambda: get_cache().delete(key))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT-аутентификация с проверкой роли и активности пользователя.
+
+    Состояние берётся из общего кэша с коротким TTL, который сбрасывается
+    при изменении пользователя. Остальные поля request.user отложены и
+    загружаются из базы только при обращении к ним."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _('Token contained no recognizable user identification')
+            )
+        state = get_user_state(user_id)
+        if state is None:
+            raise AuthenticationFailed(
+                _('User not found'), code='user_not_found'
+            )
+        if not state['is_active']:
+            raise AuthenticationFailed(
+                _('User is inactive'), code='user_inactive'
+            )
+        field_names = [
+            field.attname for field in User._meta.concrete_fields
+            if field.attname in state
+        ]
+        return User.from_db(
+            DEFAULT_DB_ALIAS,
+            field_names,
+            [state[name] for name in field_names]
+        )
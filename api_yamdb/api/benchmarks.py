@@ -0,0 +1,108 @@
+import json
+import math
+import re
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+
+SCAN_PATTERN = re.compile(r'^SCAN (?:TABLE )?(?P<table>\w+)')
+SEQ_SCAN_PATTERN = re.compile(r'Seq Scan on (?P<table>\w+)')
+EXPLAIN_PREFIXES = {
+    'sqlite': 'EXPLAIN QUERY PLAN',
+    'postgresql': 'EXPLAIN',
+}
+
+
+def percentile(values, percent):
+    """Перцентиль по методу ближайшего ранга."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(timings):
+    """Сводка по замерам времени в миллисекундах."""
+    return {
+        'p50_ms': round(percentile(timings, 50) * 1000, 3),
+        'p95_ms': round(percentile(timings, 95) * 1000, 3),
+        'samples': len(timings),
+    }
+
+
+class QueryRecorder:
+    """Обёртка execute_wrapper: собирает SQL-запросы и время их выполнения."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'sql': sql,
+                'params': params,
+                'many': many,
+                'duration': time.perf_counter() - started,
+            })
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def duration(self):
+        return sum(query['duration'] for query in self.queries)
+
+
+@contextmanager
+def record_queries(using=connection):
+    recorder = QueryRecorder()
+    with using.execute_wrapper(recorder):
+        yield recorder
+
+
+def explain_query_plan(sql, params, using=connection):
+    """План выполнения запроса (EXPLAIN QUERY PLAN или EXPLAIN)."""
+    explain = EXPLAIN_PREFIXES.get(using.vendor)
+    if explain is None:
+        return []
+    with using.cursor() as cursor:
+        cursor.execute(f'{explain} {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def full_scans(plan):
+    """Таблицы, которые план читает полным перебором."""
+    tables = []
+    for detail in plan:
+        match = SCAN_PATTERN.match(detail) or SEQ_SCAN_PATTERN.search(detail)
+        if match and match['table'] != 'CONSTANT':
+            tables.append(match['table'])
+    return tables
+
+
+def table_sizes(using=connection):
+    """Количество строк во всех таблицах базы."""
+    sizes = {}
+    with using.cursor() as cursor:
+        for table in using.introspection.table_names(cursor):
+            cursor.execute(
+                f'SELECT COUNT(*) FROM {using.ops.quote_name(table)}'
+            )
+            sizes[table] = cursor.fetchone()[0]
+    return sizes
+
+
+def dump_results(results, path):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(results, file, ensure_ascii=False, indent=2)
+
+
+def load_results(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
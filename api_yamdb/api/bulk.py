@@ -0,0 +1,179 @@
+from django.conf import settings
+from django.db import connections, transaction
+
+from reviews.models import Category, Genre, Title, TitleStats
+
+from .cache import bump_versions
+from .serializers import TitleBulkSerializer
+
+
+def slug_ids(model, slugs):
+    """Id объектов по слагам одним запросом IN."""
+    if not slugs:
+        return {}
+    return dict(
+        model.objects.filter(slug__in=slugs).values_list('slug', 'id')
+    )
+
+
+class TitleBulk:
+    """Пакетное создание и изменение Произведений.
+
+    Все элементы проверяются до записи; категории, жанры и изменяемые
+    произведения выбираются одним запросом IN каждые. Ошибки возвращаются
+    списком по элементам, как у ListSerializer."""
+
+    def __init__(self, data, partial=False):
+        self.data = data
+        self.partial = partial
+        self.items = []
+        self.errors = []
+
+    def is_valid(self):
+        if not isinstance(self.data, list) or not self.data:
+            self.errors = {
+                'non_field_errors': ['Ожидается непустой список объектов.']
+            }
+            return False
+        if len(self.data) > settings.TITLES_BULK_MAX_SIZE:
+            self.errors = {'non_field_errors': [
+                'Не больше {} объектов в запросе.'.format(
+                    settings.TITLES_BULK_MAX_SIZE
+                )
+            ]}
+            return False
+        self.errors = []
+        for item in self.data:
+            serializer = TitleBulkSerializer(data=item, partial=self.partial)
+            if serializer.is_valid():
+                self.items.append(serializer.validated_data)
+                self.errors.append({})
+            else:
+                self.items.append({})
+                self.errors.append(dict(serializer.errors))
+
+        self.categories = slug_ids(Category, {
+            item['category'] for item in self.items if 'category' in item
+        })
+        self.genres = slug_ids(Genre, {
+            slug for item in self.items for slug in item.get('genre', ())
+        })
+        self.instances = {}
+        if self.partial:
+            self.instances = Title.objects.in_bulk(
+                [item['id'] for item in self.items if 'id' in item]
+            )
+        seen = set()
+        for item, errors in zip(self.items, self.errors):
+            if not errors:
+                self.check_references(item, errors, seen)
+        return not any(self.errors)
+
+    def check_references(self, item, errors, seen):
+        """Ошибки элемента по загруженным категориям, жанрам и id."""
+        category = item.get('category')
+        if category is not None and category not in self.categories:
+            errors['category'] = [f'Категория {category} не найдена.']
+        missing = [
+            slug for slug in item.get('genre', ()) if slug not in self.genres
+        ]
+        if missing:
+            errors['genre'] = [f'Жанр {slug} не найден.' for slug in missing]
+        if self.partial:
+            if item['id'] not in self.instances:
+                errors['id'] = ['Произведение не найдено.']
+            elif item['id'] in seen:
+                errors['id'] = ['Произведение указано повторно.']
+            seen.add(item['id'])
+
+    def save(self):
+        """Записывает все элементы в одной транзакции, возвращает их id."""
+        with transaction.atomic():
+            titles = self.update() if self.partial else self.create()
+            bump_versions(
+                'titles', *(f'title:{title.pk}' for title in titles)
+            )
+        return [title.pk for title in titles]
+
+    def create(self):
+        titles = [
+            Title(
+                name=item['name'],
+                year=item['year'],
+                description=item.get('description', ''),
+                category_id=self.categories[item['category']],
+            )
+            for item in self.items
+        ]
+        self.insert_titles(titles)
+        TitleStats.objects.bulk_create(
+            TitleStats(title_id=title.pk) for title in titles
+        )
+        self.set_genres(
+            (title.pk, item['genre'])
+            for title, item in zip(titles, self.items)
+        )
+        return titles
+
+    def update(self):
+        titles = [self.instances[item['id']] for item in self.items]
+        fields = set()
+        for title, item in zip(titles, self.items):
+            for name in ('name', 'year', 'description'):
+                if name in item:
+                    setattr(title, name, item[name])
+                    fields.add(name)
+            if 'category' in item:
+                title.category_id = self.categories[item['category']]
+                fields.add('category')
+        if fields:
+            Title.objects.bulk_update(titles, fields)
+        genres = {
+            item['id']: item['genre'] for item in self.items
+            if 'genre' in item
+        }
+        if genres:
+            Title.genre.through.objects.filter(
+                title_id__in=genres
+            ).delete()
+            self.set_genres(genres.items())
+        Title.objects.filter(pk__in=[title.pk for title in titles]).touch()
+        return titles
+
+    def set_genres(self, title_genres):
+        through = Title.genre.through
+        through.objects.bulk_create(
+            through(title_id=title_id, genre_id=self.genres[slug])
+            for title_id, slugs in title_genres
+            for slug in dict.fromkeys(slugs)
+        )
+
+    @staticmethod
+    def insert_titles(titles):
+        """bulk_create с заполнением id.
+
+        Если база не возвращает id вставленных строк (SQLite в Django 3.2),
+        id назначаются подряд после значения sqlite_sequence: как и
+        AUTOINCREMENT, оно не уменьшается при удалении, поэтому id удалённых
+        произведений, а с ними ключи кэша и ETag, не используются повторно.
+
+        Блокировка записи берётся до чтения sqlite_sequence: иначе
+        транзакция, начатая чтением, не сможет перейти к записи после
+        коммита другого писателя. Конкурентные запросы ждут busy_timeout, а
+        по его истечении получают OperationalError."""
+        connection = connections[Title.objects.db]
+        if not connection.features.can_return_rows_from_bulk_insert:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'UPDATE sqlite_sequence SET seq = seq WHERE name = %s',
+                    [Title._meta.db_table]
+                )
+                cursor.execute(
+                    'SELECT seq FROM sqlite_sequence WHERE name = %s',
+                    [Title._meta.db_table]
+                )
+                row = cursor.fetchone()
+            first_id = (row[0] if row else 0) + 1
+            for idx, title in enumerate(titles):
+                title.pk = first_id + idx
+        Title.objects.bulk_create(titles)
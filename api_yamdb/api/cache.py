@@ -0,0 +1,168 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.http import Http404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from reviews.models import Title
+
+from .metrics import CACHE_REQUESTS
+from .timing import route_name
+
+VERSION_KEY = 'api:version:{}'
+RESPONSE_KEY = 'api:response:{}:{}'
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def is_shared_cache():
+    """Кэш API общий для всех процессов сервера.
+
+    LocMemCache хранит версии в памяти процесса, и bump_versions из
+    другого воркера или команды manage.py его не инвалидирует."""
+    return not isinstance(get_cache(), (LocMemCache, DummyCache))
+
+
+def request_key(request):
+    """Хэш абсолютного URL: ответы содержат абсолютные ссылки next и
+    previous, поэтому зависят от схемы и хоста запроса."""
+    return hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+
+
+def get_versions(names):
+    cache = get_cache()
+    keys = [VERSION_KEY.format(name) for name in names]
+    versions = cache.get_many(keys)
+    return [versions.get(key, 1) for key in keys]
+
+
+def bump_versions(*names):
+    """Инвалидирует ответы, зависящие от указанных групп."""
+    def bump():
+        cache = get_cache()
+        for name in names:
+            key = VERSION_KEY.format(name)
+            if not cache.add(key, 2, timeout=None):
+                try:
+                    cache.incr(key)
+                except ValueError:
+                    cache.set(key, 2, timeout=None)
+    transaction.on_commit(bump)
+
+
+class CachedResponseMixin:
+    """Кэширование ответов для безопасных методов.
+
+    Ключ строится по URL запроса и версиям групп, от которых зависит
+    ответ; сигналы моделей увеличивают версии при изменениях. С
+    локальным для процесса кэшем ответы не кэшируются."""
+
+    def cached_response(self, names, view, request, *args, **kwargs):
+        if not is_shared_cache():
+            return view(request, *args, **kwargs)
+        versions = '.'.join(str(version) for version in get_versions(names))
+        key = RESPONSE_KEY.format(versions, request_key(request))
+        cache = get_cache()
+        data = cache.get(key)
+        CACHE_REQUESTS.inc(
+            route=route_name(request),
+            result='miss' if data is None else 'hit'
+        )
+        if data is not None:
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        response = view(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.API_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return response
+
+
+class CachedListMixin(CachedResponseMixin):
+    """Кэширование ответов list."""
+    list_cache_versions = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            self.list_cache_versions, super().list, request, *args, **kwargs
+        )
+
+
+class CachedRetrieveMixin(CachedResponseMixin):
+    """Кэширование ответов retrieve с версией самого объекта.
+
+    Версия объекта ищется по числовому id, так что /titles/05/ и
+    /titles/5/ инвалидируются вместе."""
+    detail_cache_versions = ()
+    detail_cache_prefix = None
+
+    def retrieve(self, request, *args, **kwargs):
+        names = list(self.detail_cache_versions)
+        if self.detail_cache_prefix:
+            lookup = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+            try:
+                pk = int(lookup)
+            except (TypeError, ValueError):
+                raise Http404
+            names.append(f'{self.detail_cache_prefix}:{pk}')
+        return self.cached_response(
+            names, super().retrieve, request, *args, **kwargs
+        )
+
+
+class ConditionalGetMixin:
+    """Weak ETag и Last-Modified по версии произведения.
+
+    Версия растёт при изменении произведения, его отзывов и комментариев,
+    поэтому ответ 304 отдаётся до выборки объектов и сериализации."""
+    conditional_actions = ('list', 'retrieve')
+    title_lookup_kwarg = 'title_id'
+
+    def get_title_state(self):
+        """Произведение с полями version и updated или None.
+
+        Id произведения берётся из kwargs маршрута по title_lookup_kwarg."""
+        try:
+            return Title.objects.only('version', 'updated').filter(
+                pk=self.kwargs.get(self.title_lookup_kwarg)
+            ).first()
+        except (TypeError, ValueError):
+            return None
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def conditional_response(self, view, request, *args, **kwargs):
+        title = None
+        if self.action in self.conditional_actions:
+            title = self.get_title_state()
+        if title is None:
+            return view(request, *args, **kwargs)
+        etag = f'W/"{title.version}-{request_key(request)[:16]}"'
+        last_modified = int(title.updated.timestamp())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = view(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return response
@@ -0,0 +1,113 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+request_wrappers = ContextVar('request_wrappers', default=())
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+@contextmanager
+def execute_wrapper(wrapper):
+    """Подключает обёртку execute_wrapper ко всем соединениям запроса.
+
+    Обёртка хранится в contextvars, а не на соединениях текущего потока,
+    поэтому действует и в потоках, куда запрос переходит через
+    sync_to_async: синхронные view под ASGI, запись, пул run_sync."""
+    token = request_wrappers.set(request_wrappers.get() + (wrapper,))
+    try:
+        yield
+    finally:
+        request_wrappers.reset(token)
+
+
+def run_request_wrappers(execute, sql, params, many, context):
+    """Постоянная обёртка каждого соединения, вызывает обёртки запроса
+    в порядке connection.execute_wrapper: первая - внешняя."""
+    for wrapper in reversed(request_wrappers.get()):
+        execute = partial(wrapper, execute)
+    return execute(sql, params, many, context)
+
+
+def install_request_wrappers(connection):
+    """Ставит run_request_wrappers первой в списке обёрток соединения.
+
+    Вставка в начало не мешает connection.execute_wrapper(), который
+    снимает последнюю обёртку."""
+    if run_request_wrappers not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, run_request_wrappers)
+
+
+def get_executor():
+    """Пул из ASYNC_DB_WORKERS потоков для ORM из асинхронных view.
+
+    Каждый поток держит свои соединения с базой, поэтому размер пула
+    ограничивает и число соединений процесса."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.ASYNC_DB_WORKERS,
+                    thread_name_prefix='async-db'
+                )
+    return _executor
+
+
+async def run_sync(func, *args, **kwargs):
+    """Выполняет синхронную func в пуле get_executor().
+
+    sync_to_async копирует contextvars, вместе с ними в поток пула
+    переходят обёртки execute_wrapper() текущего запроса."""
+
+    def call():
+        close_old_connections()
+        return func(*args, **kwargs)
+
+    return await sync_to_async(
+        call, thread_sensitive=False, executor=get_executor()
+    )()
+
+
+class HybridMiddleware:
+    """Middleware для WSGI и ASGI.
+
+    Под ASGI цепочка остаётся асинхронной, и асинхронные view не
+    переводятся в поток. Подклассы готовят запрос в start(), регистрируя
+    очистку в stack, и обрабатывают ответ в finish()."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with ExitStack() as stack:
+            state = self.start(request, stack)
+            response = self.get_response(request)
+        return self.finish(request, response, state)
+
+    async def __acall__(self, request):
+        with ExitStack() as stack:
+            state = self.start(request, stack)
+            response = await self.get_response(request)
+        return self.finish(request, response, state)
+
+    def start(self, request, stack):
+        return None
+
+    def finish(self, request, response, state):
+        return response
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core import signing
+
+SALT = 'api.confirmation.code'
+
+
+def make_confirmation_code(user_id):
+    """Подписанный код подтверждения: метка времени и HMAC от id и времени.
+
+    Код не хранится в базе, сам id в код не входит."""
+    signer = signing.TimestampSigner(salt=SALT)
+    return signer.sign(str(user_id)).split(signer.sep, 1)[1]
+
+
+def check_confirmation_code(user_id, code):
+    """Проверяет подпись и срок действия кода без обращения к базе."""
+    signer = signing.TimestampSigner(salt=SALT)
+    try:
+        signer.unsign(
+            f'{user_id}{signer.sep}{code}',
+            max_age=settings.CONFIRMATION_CODE_TIMEOUT
+        )
+    except signing.BadSignature:
+        return False
+    return True
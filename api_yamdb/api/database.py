@@ -0,0 +1,59 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+routing_state = ContextVar('routing_state', default=None)
+
+
+def configure_connection(connection):
+    """Применяет SQLITE_PRAGMAS к новому соединению с SQLite.
+
+    WAL позволяет читать во время записи, synchronous=NORMAL в режиме WAL
+    убирает fsync на каждой транзакции, busy_timeout ждёт освобождения
+    блокировки вместо немедленной ошибки database is locked."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+class ReplicaRouter:
+    """Чтение моделей из DATABASE_REPLICA_APPS на репликах, запись - в
+    основную базу.
+
+    Реплика используется, только если ReplicaRoutingMiddleware разрешила
+    её для текущего запроса; после первой записи в запросе чтение
+    возвращается в основную базу."""
+
+    def db_for_read(self, model, **hints):
+        state = routing_state.get()
+        if (
+            state is not None and state['replica']
+            and settings.DATABASE_REPLICAS
+            and model._meta.app_label in settings.DATABASE_REPLICA_APPS
+        ):
+            return random.choice(settings.DATABASE_REPLICAS)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = routing_state.get()
+        if state is not None:
+            state['replica'] = False
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+
+@contextmanager
+def replica_reads(allowed):
+    """Разрешает или запрещает чтение с реплик внутри блока."""
+    token = routing_state.set({'replica': allowed})
+    try:
+        yield
+    finally:
+        routing_state.reset(token)
@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from reviews.models import OutgoingMail
+
+
+def enqueue_mail(subject, message, recipient_list, from_email=None):
+    """Ставит письма в очередь вместо отправки внутри запроса."""
+    return OutgoingMail.objects.bulk_create(
+        OutgoingMail(
+            subject=subject,
+            message=message,
+            from_email=from_email or settings.EMAIL,
+            recipient=recipient,
+        )
+        for recipient in recipient_list
+    )
+
+
+def retry_delay(attempts):
+    """Экспоненциальная задержка перед повторной отправкой."""
+    delay = settings.MAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+    return timedelta(
+        seconds=min(delay, settings.MAIL_OUTBOX_MAX_RETRY_DELAY)
+    )
+
+
+def postpone(mail, error, now):
+    mail.send_after = now + retry_delay(mail.attempts)
+    mail.error = str(error)
+
+
+def deliver_pending(batch_size):
+    """Отправляет пачку писем из очереди через одно соединение.
+
+    Возвращает количество отправленных и отложенных писем."""
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            OutgoingMail.objects.select_for_update(skip_locked=True).filter(
+                sent__isnull=True,
+                send_after__lte=now,
+                attempts__lt=settings.MAIL_OUTBOX_MAX_ATTEMPTS,
+            ).order_by('send_after', 'id')[:batch_size]
+        )
+        if not batch:
+            return 0, 0
+        for mail in batch:
+            mail.attempts += 1
+        pending = list(reversed(batch))
+        try:
+            with get_connection() as connection:
+                while pending:
+                    mail = pending.pop()
+                    try:
+                        EmailMessage(
+                            subject=mail.subject,
+                            body=mail.message,
+                            from_email=mail.from_email,
+                            to=[mail.recipient],
+                            connection=connection,
+                        ).send()
+                    except Exception as error:
+                        postpone(mail, error, now)
+                    else:
+                        mail.sent = now
+                        mail.error = ''
+        except Exception as error:
+            for mail in pending:
+                postpone(mail, error, now)
+        OutgoingMail.objects.bulk_update(
+            batch, ('attempts', 'send_after', 'sent', 'error')
+        )
+    sent = sum(1 for mail in batch if mail.sent is not None)
+    return sent, len(batch) - sent
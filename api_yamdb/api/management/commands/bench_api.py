@@ -0,0 +1,203 @@
+import json
+import logging
+import subprocess
+import time
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.benchmarks import (
+    dump_results, explain_query_plan, full_scans, load_results,
+    record_queries, summarize, table_sizes
+)
+from api.urls import urlpatterns_auth, v1_router
+from reviews.models import Category, Comment, Genre, User
+
+from .seed_data import BENCH_ADMIN
+
+
+class Command(BaseCommand):
+    """Замер числа SQL-запросов и задержки для всех эндпоинтов API."""
+    help = 'Command for benchmarking every API route'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--output', default='bench_api.json')
+        parser.add_argument(
+            '--compare', help='JSON с результатами предыдущего запуска'
+        )
+
+    def handle(self, *args, **options):
+        admin = User.objects.filter(username=BENCH_ADMIN).first()
+        comment = Comment.objects.first()
+        if admin is None or comment is None:
+            raise CommandError('Сначала заполните базу командой seed_data.')
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(admin)}'
+        )
+        self.admin = admin
+        self.sizes = table_sizes()
+        self.kwargs = {
+            'title_id': comment.title_id,
+            'review_id': comment.review_id,
+            'username': admin.username,
+            'board': 'top-rated',
+        }
+        self.pks = {
+            'title': comment.title_id,
+            'reviews': comment.review_id,
+            'comments': comment.pk,
+            'category': Category.objects.values_list(
+                'slug', flat=True
+            ).first(),
+            'genre': Genre.objects.values_list('slug', flat=True).first(),
+            'users': admin.username,
+        }
+        self.payloads = self.build_payloads()
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+        results = {
+            'meta': {
+                'created': datetime.now(timezone.utc).isoformat(),
+                'commit': self.git_commit(),
+                'vendor': connection.vendor,
+                'iterations': options['iterations'],
+                'tables': self.sizes,
+            },
+            'routes': {},
+        }
+        for name, method, url, data in self.routes():
+            result = self.measure(
+                method, url, data, options['iterations'], options['warmup']
+            )
+            results['routes'][f'{method} {name}'] = result
+            self.stdout.write(
+                f'{method:6} {name:24} {result["status"]} '
+                f'p50={result["p50_ms"]}ms p95={result["p95_ms"]}ms '
+                f'queries={result["queries"]} '
+                f'rows_scanned={result["rows_scanned"]}'
+            )
+        dump_results(results, options['output'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Результаты сохранены в {options["output"]}'
+        ))
+        if options['compare']:
+            self.compare(load_results(options['compare']), results)
+
+    def routes(self):
+        """Маршруты v1_router и авторизации с тестовыми данными."""
+        for pattern in v1_router.urls:
+            groups = pattern.pattern.regex.groupindex
+            if 'format' in groups:
+                continue
+            basename = pattern.name.rpartition('-')[0]
+            kwargs = {
+                key: self.pks[basename] if key in ('pk', 'slug')
+                else self.kwargs[key]
+                for key in groups
+            }
+            url = reverse(pattern.name, kwargs=kwargs)
+            actions = getattr(pattern.callback, 'actions', {'get': 'get'})
+            for method in ('get', 'post', 'delete'):
+                if method in actions:
+                    yield pattern.name, method.upper(), url, (
+                        self.payloads.get(basename)
+                    )
+        for pattern in urlpatterns_auth:
+            yield pattern.name, 'POST', reverse(pattern.name), (
+                self.payloads[pattern.name]
+            )
+
+    def build_payloads(self):
+        return {
+            'category': {'name': 'Бенчмарк', 'slug': 'bench-category'},
+            'genre': {'name': 'Бенчмарк', 'slug': 'bench-genre'},
+            'title': {
+                'name': 'Бенчмарк',
+                'year': 2000,
+                'genre': [self.pks['genre']],
+                'category': self.pks['category'],
+            },
+            'reviews': {'text': 'Бенчмарк', 'score': 5},
+            'comments': {'text': 'Бенчмарк'},
+            'users': {
+                'username': 'bench_new_user',
+                'email': 'bench_new_user@yamdb.fake',
+            },
+            'registration': {
+                'username': 'bench_signup',
+                'email': 'bench_signup@yamdb.fake',
+            },
+            'token': {
+                'username': self.admin.username,
+                'confirmation_code': 'invalid',
+            },
+        }
+
+    def request(self, method, url, data):
+        if method == 'GET':
+            return self.client.get(url)
+        with transaction.atomic():
+            response = self.client.generic(
+                method, url, json.dumps(data or {}), 'application/json'
+            )
+            transaction.set_rollback(True)
+        return response
+
+    def measure(self, method, url, data, iterations, warmup):
+        for _ in range(warmup):
+            self.request(method, url, data)
+        timings = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            self.request(method, url, data)
+            timings.append(time.perf_counter() - started)
+        with record_queries() as recorder:
+            response = self.request(method, url, data)
+        scanned_tables = []
+        if method == 'GET':
+            for query in recorder.queries:
+                if not query['many']:
+                    scanned_tables += full_scans(explain_query_plan(
+                        query['sql'], query['params']
+                    ))
+        return {
+            'method': method,
+            'url': url,
+            'status': response.status_code,
+            **summarize(timings),
+            'queries': recorder.count,
+            'full_scans': len(scanned_tables),
+            'rows_scanned': sum(
+                self.sizes.get(table, 0) for table in scanned_tables
+            ),
+        }
+
+    def compare(self, previous, current):
+        self.stdout.write(
+            f'Сравнение с {previous["meta"].get("commit")}:'
+        )
+        for route, result in current['routes'].items():
+            before = previous['routes'].get(route)
+            if before is None:
+                continue
+            self.stdout.write(
+                f'{route:31} '
+                f'p95 {before["p95_ms"]} -> {result["p95_ms"]}ms, '
+                f'queries {before["queries"]} -> {result["queries"]}'
+            )
+
+    @staticmethod
+    def git_commit():
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
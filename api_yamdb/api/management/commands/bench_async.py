@@ -0,0 +1,114 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from itertools import cycle, islice
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmarks import dump_results, summarize
+from reviews.models import Comment
+
+
+class Command(BaseCommand):
+    """Нагрузочное сравнение чтения под ASGI и WSGI.
+
+    Серверы запускаются отдельно на одной базе, например:
+    uvicorn api_yamdb.asgi:application --port 8001
+    gunicorn api_yamdb.wsgi --threads 8 --bind 127.0.0.1:8000"""
+    help = 'Command for load testing read endpoints under ASGI and WSGI'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--asgi-url', default='http://127.0.0.1:8001')
+        parser.add_argument('--wsgi-url', default='http://127.0.0.1:8000')
+        parser.add_argument(
+            '--concurrency', type=int, nargs='+', default=[1, 8, 32, 128]
+        )
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--timeout', type=float, default=10)
+        parser.add_argument('--output', default='bench_async.json')
+
+    def handle(self, *args, **options):
+        comment = Comment.objects.first()
+        if comment is None:
+            raise CommandError('Сначала заполните базу командой seed_data.')
+        self.timeout = options['timeout']
+        paths = self.paths(comment)
+        results = {
+            'meta': {
+                'created': datetime.now(timezone.utc).isoformat(),
+                'requests': options['requests'],
+                'paths': paths,
+            },
+            'servers': {},
+        }
+        for server in ('asgi', 'wsgi'):
+            base_url = options[f'{server}_url'].rstrip('/')
+            results['servers'][server] = {}
+            for concurrency in options['concurrency']:
+                result = self.measure(
+                    [f'{base_url}{path}' for path in paths],
+                    options['requests'], max(concurrency, 1)
+                )
+                results['servers'][server][concurrency] = result
+                self.stdout.write(
+                    f'{server} concurrency={concurrency:<4} '
+                    f'rps={result["requests_per_second"]} '
+                    f'p50={result["p50_ms"]}ms p95={result["p95_ms"]}ms '
+                    f'errors={result["errors"]}'
+                )
+        dump_results(results, options['output'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Результаты сохранены в {options["output"]}'
+        ))
+
+    def paths(self, comment):
+        title = f'/api/v1/titles/{comment.title_id}/'
+        review = f'{title}reviews/{comment.review_id}/'
+        return [
+            '/api/v1/categories/',
+            '/api/v1/genres/',
+            '/api/v1/titles/',
+            title,
+            f'{title}reviews/',
+            review,
+            f'{review}comments/',
+            f'{review}comments/{comment.pk}/',
+        ]
+
+    def measure(self, urls, total, concurrency):
+        per_worker = max(total // concurrency, 1)
+        batches = [
+            list(islice(cycle(urls), worker, worker + per_worker))
+            for worker in range(concurrency)
+        ]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            outcomes = list(executor.map(self.worker, batches))
+        elapsed = time.perf_counter() - started
+        timings = [timing for batch, _ in outcomes for timing in batch]
+        errors = sum(errors for _, errors in outcomes)
+        if not timings:
+            raise CommandError(f'Нет успешных ответов от {urls[0]}')
+        return {
+            'requests_per_second': round(len(timings) / elapsed, 1),
+            'errors': errors,
+            **summarize(timings),
+        }
+
+    def worker(self, urls):
+        timings = []
+        errors = 0
+        with requests.Session() as session:
+            for url in urls:
+                started = time.perf_counter()
+                try:
+                    response = session.get(url, timeout=self.timeout)
+                except requests.RequestException:
+                    errors += 1
+                    continue
+                if response.status_code != 200:
+                    errors += 1
+                    continue
+                timings.append(time.perf_counter() - started)
+        return timings, errors
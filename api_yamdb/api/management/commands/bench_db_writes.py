@@ -0,0 +1,109 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections, transaction
+from django.test.utils import override_settings
+
+from api.benchmarks import dump_results, summarize
+
+TABLE = 'bench_db_writes'
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'delete',
+    'synchronous': 'full',
+    'mmap_size': 0,
+    'busy_timeout': 5000,
+}
+
+
+class Command(BaseCommand):
+    """Замер конкурентной записи в базу с настройками по умолчанию и
+    с SQLITE_PRAGMAS."""
+    help = 'Command for benchmarking concurrent database writes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--transactions', type=int, default=200)
+        parser.add_argument('--output', default='bench_db_writes.json')
+
+    def handle(self, *args, **options):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {TABLE} '
+                '(id integer PRIMARY KEY, worker integer, payload text)'
+            )
+        profiles = ['current']
+        if connection.vendor == 'sqlite':
+            profiles = ['default', 'tuned']
+        results = {
+            'meta': {
+                'created': datetime.now(timezone.utc).isoformat(),
+                'vendor': connection.vendor,
+                'workers': options['workers'],
+            },
+            'profiles': {},
+        }
+        try:
+            for profile in profiles:
+                result = self.run(
+                    profile, options['workers'], options['transactions']
+                )
+                results['profiles'][profile] = result
+                self.stdout.write(
+                    f'{profile:8} tps={result["transactions_per_second"]} '
+                    f'p50={result["p50_ms"]}ms p95={result["p95_ms"]}ms '
+                    f'errors={result["errors"]}'
+                )
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+        dump_results(results, options['output'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Результаты сохранены в {options["output"]}'
+        ))
+
+    def run(self, profile, workers, count):
+        pragmas = settings.SQLITE_PRAGMAS
+        if profile == 'default':
+            pragmas = DEFAULT_PRAGMAS
+        # journal_mode хранится в файле базы и переключается только без
+        # других открытых соединений.
+        connections.close_all()
+        with override_settings(SQLITE_PRAGMAS=pragmas):
+            connection.ensure_connection()
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                batches = list(executor.map(
+                    self.worker, range(workers), [count] * workers
+                ))
+            elapsed = time.perf_counter() - started
+            connections.close_all()
+        timings = [timing for batch, _ in batches for timing in batch]
+        return {
+            'transactions_per_second': round(len(timings) / elapsed, 1),
+            'errors': sum(errors for _, errors in batches),
+            **summarize(timings),
+        }
+
+    def worker(self, number, count):
+        timings = []
+        errors = 0
+        try:
+            for _ in range(count):
+                started = time.perf_counter()
+                try:
+                    with transaction.atomic():
+                        with connection.cursor() as cursor:
+                            cursor.execute(
+                                f'INSERT INTO {TABLE} (worker, payload) '
+                                'VALUES (%s, %s)', [number, 'x' * 256]
+                            )
+                except OperationalError:
+                    errors += 1
+                    continue
+                timings.append(time.perf_counter() - started)
+        finally:
+            connections.close_all()
+        return timings, errors
@@ -0,0 +1,93 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.benchmarks import dump_results, record_queries, summarize
+from api.confirmation import make_confirmation_code
+from reviews.models import User
+
+BENCH_USER = 'bench_token'
+
+
+class Command(BaseCommand):
+    """Замер пропускной способности эндпоинта получения токена."""
+    help = 'Command for benchmarking token endpoint throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--warmup', type=int, default=20)
+        parser.add_argument('--output', default='bench_token.json')
+
+    def handle(self, *args, **options):
+        user, created = User.objects.get_or_create(
+            username=BENCH_USER,
+            defaults={'email': f'{BENCH_USER}@yamdb.fake'}
+        )
+        try:
+            self.benchmark(user, options)
+        finally:
+            if created:
+                user.delete()
+
+    def benchmark(self, user, options):
+        self.url = reverse('token')
+        self.data = {
+            'username': user.username,
+            'confirmation_code': make_confirmation_code(user.pk),
+        }
+        self.worker(options['warmup'])
+        with record_queries() as recorder:
+            status = self.post(APIClient()).status_code
+
+        concurrency = max(options['concurrency'], 1)
+        per_worker = max(options['requests'] // concurrency, 1)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            batches = list(executor.map(
+                self.worker, [per_worker] * concurrency
+            ))
+        elapsed = time.perf_counter() - started
+
+        timings = [timing for batch in batches for timing in batch]
+        result = {
+            'meta': {
+                'created': datetime.now(timezone.utc).isoformat(),
+                'vendor': connection.vendor,
+                'concurrency': concurrency,
+            },
+            'status': status,
+            'queries': recorder.count,
+            'requests_per_second': round(len(timings) / elapsed, 1),
+            **summarize(timings),
+        }
+        dump_results(result, options['output'])
+        self.stdout.write(
+            f'POST {self.url} {status} '
+            f'rps={result["requests_per_second"]} '
+            f'p50={result["p50_ms"]}ms p95={result["p95_ms"]}ms '
+            f'queries={result["queries"]}'
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Результаты сохранены в {options["output"]}'
+        ))
+
+    def post(self, client):
+        return client.post(self.url, self.data, format='json')
+
+    def worker(self, count):
+        client = APIClient()
+        timings = []
+        try:
+            for _ in range(count):
+                started = time.perf_counter()
+                self.post(client)
+                timings.append(time.perf_counter() - started)
+        finally:
+            connections.close_all()
+        return timings
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from reviews.models import Title, TitleStats
+
+
+class Command(BaseCommand):
+    """Сверка материализованной статистики с отзывами и комментариями."""
+    help = 'Command for verifying stored title statistics'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix', action='store_true',
+            help='Пересчитать расходящиеся и создать недостающие строки'
+        )
+
+    def handle(self, *args, **options):
+        mismatched = list(
+            TitleStats.objects.mismatched().values_list('title_id', flat=True)
+        )
+        missing = Title.objects.filter(stats__isnull=True).count()
+        for title_id in mismatched:
+            self.stdout.write(f'Расходится статистика произведения {title_id}')
+        if options['fix']:
+            with transaction.atomic():
+                fixed = TitleStats.objects.filter(
+                    title_id__in=mismatched
+                ).rebuild()
+                created = TitleStats.objects.materialize()
+            self.stdout.write(self.style.SUCCESS(
+                f'Пересчитано строк - {fixed}, создано - {created}'
+            ))
+            return
+        if mismatched or missing:
+            raise CommandError(
+                f'Расходится статистика произведений - {len(mismatched)}, '
+                f'без статистики - {missing}'
+            )
+        self.stdout.write(self.style.SUCCESS('Статистика совпадает'))
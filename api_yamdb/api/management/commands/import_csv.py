@@ -1,17 +1,59 @@
 import csv
+import os
+import queue
+import threading
+import time
+from itertools import islice
 
 from django.core.management.base import BaseCommand
+from django.db import transaction
 
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.models import (
+    Category, Comment, Genre, Review, Title, TitleStats, User
+)
 
-CSV = {
-    User: 'users.csv',
-    Category: 'category.csv',
-    Title: 'titles.csv',
-    Genre: 'genre.csv',
-    Review: 'review.csv',
-    Comment: 'comments.csv'
-}
+CSV = (
+    (User, 'users.csv'),
+    (Category, 'category.csv'),
+    (Title, 'titles.csv'),
+    (Genre, 'genre.csv'),
+    (Title.genre.through, 'genre_title.csv'),
+    (Review, 'review.csv'),
+    (Comment, 'comments.csv'),
+)
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class BatchReader(threading.Thread):
+    """Разбор csv-файла в фоновом потоке с выдачей строк пачками."""
+
+    def __init__(self, path, batch_size, queue_size):
+        super().__init__(daemon=True)
+        self.path = path
+        self.batch_size = batch_size
+        self.batches = queue.Queue(maxsize=queue_size)
+
+    def run(self):
+        try:
+            with open(self.path, encoding='utf-8') as csv_file:
+                reader = csv.DictReader(csv_file)
+                for batch in batched(reader, self.batch_size):
+                    self.batches.put(batch)
+        except Exception as error:
+            self.batches.put(error)
+        finally:
+            self.batches.put(None)
+
+    def __iter__(self):
+        while (batch := self.batches.get()) is not None:
+            if isinstance(batch, Exception):
+                raise batch
+            yield batch
 
 
 class Command(BaseCommand):
@@ -22,29 +64,104 @@ class Command(BaseCommand):
         parser.add_argument(
             'csv_path', type=str, nargs='?', default='static/data'
         )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--queue-size', type=int, default=4,
+            help='Сколько разобранных пачек держать в памяти на файл'
+        )
 
     def handle(self, *args, **options):
         count = 0
-        csv_path = options['csv_path']
-        for model, file in CSV.items():
-            with open(f'{csv_path}/{file}', encoding='utf-8') as csv_file:
-                reader = csv.DictReader(csv_file)
-                if model.objects.exists():
-                    self.stdout.write(self.style.WARNING(
-                        f'Для модели "{model._meta.verbose_name}" '
-                        f'данные уже добавлены!')
-                    )
-                    continue
-                created_objects = model.objects.bulk_create(
-                    model(**data) for data in reader
+        started = time.perf_counter()
+        readers = {
+            model: BatchReader(
+                os.path.join(options['csv_path'], file),
+                options['batch_size'],
+                options['queue_size']
+            )
+            for model, file in CSV
+        }
+        self.ids = {}
+        self.referenced = {
+            field.related_model
+            for model in readers
+            for field in model._meta.concrete_fields
+            if field.is_relation
+        }
+        pending = []
+        for model, reader in readers.items():
+            if model.objects.exists():
+                self.stdout.write(self.style.WARNING(
+                    f'Для модели "{model._meta.verbose_name}" '
+                    f'данные уже добавлены!')
                 )
-                count += len(created_objects)
-
-        with open('static/data/genre_title.csv', encoding='utf-8') as gt:
-            reader = csv.DictReader(gt)
-            for row in reader:
-                title = Title.objects.get(id=row['title_id'])
-                genre = Genre.objects.get(id=row['genre_id'])
-                title.genre.add(genre)
-                count += 1
-        self.stdout.write(self.style.SUCCESS(f'Добавлено записей - {count}'))
+                if model in self.referenced:
+                    self.ids[model] = set(
+                        model.objects.values_list('pk', flat=True)
+                    )
+                continue
+            reader.start()
+            pending.append(model)
+        for model in pending:
+            count += self.import_model(model, readers[model])
+        if Review in pending:
+            Title.objects.rebuild_rating()
+        if pending:
+            TitleStats.objects.rebuild()
+            TitleStats.objects.materialize()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Добавлено записей - {count} '
+            f'({count / elapsed:.0f} записей/с)'
+        ))
+
+    def import_model(self, model, reader):
+        """Пакетная вставка строк одного файла в одной транзакции."""
+        started = time.perf_counter()
+        foreign_keys = [
+            field for field in model._meta.concrete_fields
+            if field.is_relation
+        ]
+        ids = self.ids.setdefault(model, set())
+        keep_ids = model in self.referenced
+        count = skipped = 0
+        with transaction.atomic():
+            for batch in reader:
+                objects = []
+                for row in batch:
+                    if not self.resolve(row, foreign_keys):
+                        skipped += 1
+                        continue
+                    objects.append(model(**row))
+                model.objects.bulk_create(objects)
+                if keep_ids:
+                    ids.update(
+                        int(obj.pk) for obj in objects if obj.pk is not None
+                    )
+                count += len(objects)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{model._meta.verbose_name}: {count} '
+            f'({count / elapsed:.0f} записей/с)'
+        )
+        if skipped:
+            self.stdout.write(self.style.WARNING(
+                f'{model._meta.verbose_name}: пропущено строк с '
+                f'несуществующими связями - {skipped}'
+            ))
+        return count
+
+    def resolve(self, row, foreign_keys):
+        """Проверяет внешние ключи строки по уже загруженным id."""
+        for field in foreign_keys:
+            value = row.get(field.attname)
+            if not value:
+                row[field.attname] = None
+                if not field.null:
+                    return False
+                continue
+            related_ids = self.ids.get(field.related_model)
+            if related_ids is not None and int(value) not in related_ids:
+                return False
+            row[field.attname] = int(value)
+        return True
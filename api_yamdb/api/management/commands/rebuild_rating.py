@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    """Пересчёт сохранённого рейтинга произведений."""
+    help = 'Command for rebuilding stored title ratings'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            updated = Title.objects.rebuild_rating()
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитан рейтинг произведений - {updated}'
+        ))
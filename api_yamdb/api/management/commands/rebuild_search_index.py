@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from reviews.search import ensure_search_index, rebuild_search_index
+
+
+class Command(BaseCommand):
+    """Перестроение поискового индекса Произведений."""
+    help = 'Command for rebuilding the title search index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if not ensure_search_index(connection):
+            rebuild_search_index(connection)
+        self.stdout.write(self.style.SUCCESS('Поисковый индекс перестроен'))
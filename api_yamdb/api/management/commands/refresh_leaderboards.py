@@ -0,0 +1,39 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.cache import bump_versions
+from reviews.leaderboards import refresh_leaderboards
+
+
+class Command(BaseCommand):
+    """Пересчёт таблицы рейтингов произведений."""
+    help = 'Command for refreshing title leaderboards'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--size', type=int, default=settings.LEADERBOARD_SIZE
+        )
+        parser.add_argument(
+            '--min-reviews', type=int,
+            default=settings.LEADERBOARD_MIN_REVIEWS
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Не завершаться, пересчитывая каждые --interval секунд'
+        )
+        parser.add_argument('--interval', type=float, default=300)
+
+    def handle(self, *args, **options):
+        while True:
+            count = refresh_leaderboards(
+                options['size'], options['min_reviews']
+            )
+            bump_versions('leaderboards')
+            self.stdout.write(self.style.SUCCESS(
+                f'Пересчитаны рейтинги, строк - {count}'
+            ))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,139 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from reviews.models import (
+    Category, Comment, Genre, Review, Title, TitleStats, User
+)
+
+from .import_csv import batched
+
+BENCH_ADMIN = 'bench_admin'
+
+
+class Command(BaseCommand):
+    """Заполнение базы синтетическими данными для бенчмарков."""
+    help = 'Command for seeding a synthetic dataset for benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--genres', type=int, default=50)
+        parser.add_argument('--titles', type=int, default=100_000)
+        parser.add_argument('--reviews', type=int, default=5_000_000)
+        parser.add_argument('--comments', type=int, default=20_000_000)
+        parser.add_argument('--genres-per-title', type=int, default=2)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if Title.objects.exists():
+            raise CommandError(
+                'Произведения уже добавлены, используйте пустую базу.'
+            )
+        if options['reviews'] > options['titles'] * options['users']:
+            raise CommandError(
+                'Отзывов больше, чем пар пользователь-произведение.'
+            )
+        self.batch_size = options['batch_size']
+        self.options = options
+        user_ids = self.seed_users(options['users'])
+        self.seed_catalog(Category, options['categories'])
+        self.seed_catalog(Genre, options['genres'])
+        self.seed_titles()
+        self.seed_reviews(user_ids)
+        self.seed_comments(user_ids)
+        Title.objects.rebuild_rating()
+        TitleStats.objects.materialize()
+        self.stdout.write(self.style.SUCCESS('Синтетические данные добавлены'))
+
+    def bulk_insert(self, model, objects):
+        count = 0
+        with transaction.atomic():
+            for batch in batched(objects, self.batch_size):
+                model.objects.bulk_create(batch, batch_size=self.batch_size)
+                count += len(batch)
+        self.stdout.write(f'{model._meta.verbose_name_plural}: {count}')
+
+    def seed_users(self, amount):
+        if not User.objects.filter(username=BENCH_ADMIN).exists():
+            User.objects.create_user(
+                BENCH_ADMIN, f'{BENCH_ADMIN}@yamdb.fake', role='admin'
+            )
+        first_id = (User.objects.order_by('-id').values_list(
+            'id', flat=True
+        ).first() or 0) + 1
+        self.bulk_insert(User, (
+            User(
+                id=first_id + idx,
+                username=f'bench_user_{first_id + idx}',
+                email=f'bench_user_{first_id + idx}@yamdb.fake',
+                password='!',
+            )
+            for idx in range(amount)
+        ))
+        return range(first_id, first_id + amount)
+
+    def seed_catalog(self, model, amount):
+        prefix = model._meta.model_name
+        first_id = (model.objects.order_by('-id').values_list(
+            'id', flat=True
+        ).first() or 0) + 1
+        self.bulk_insert(model, (
+            model(
+                id=first_id + idx,
+                name=f'{prefix} {first_id + idx}',
+                slug=f'{prefix}-{first_id + idx}',
+            )
+            for idx in range(amount)
+        ))
+
+    def seed_titles(self):
+        categories = list(Category.objects.values_list('id', flat=True))
+        genres = list(Genre.objects.values_list('id', flat=True))
+        titles = self.options['titles']
+        self.bulk_insert(Title, (
+            Title(
+                id=idx,
+                name=f'Произведение {idx}',
+                year=1900 + idx % 120,
+                category_id=categories[idx % len(categories)],
+            )
+            for idx in range(1, titles + 1)
+        ))
+        per_title = min(self.options['genres_per_title'], len(genres))
+        self.bulk_insert(Title.genre.through, (
+            Title.genre.through(
+                title_id=idx,
+                genre_id=genres[(idx + shift) % len(genres)],
+            )
+            for idx in range(1, titles + 1)
+            for shift in range(per_title)
+        ))
+
+    def seed_reviews(self, user_ids):
+        titles = self.options['titles']
+        self.bulk_insert(Review, (
+            Review(
+                id=idx + 1,
+                title_id=idx % titles + 1,
+                author_id=user_ids[idx // titles % len(user_ids)],
+                text=f'Отзыв {idx + 1}',
+                score=idx % 10 + 1,
+            )
+            for idx in range(self.options['reviews'])
+        ))
+
+    def seed_comments(self, user_ids):
+        titles = self.options['titles']
+        reviews = self.options['reviews']
+        if not reviews:
+            return
+        self.bulk_insert(Comment, (
+            Comment(
+                id=idx + 1,
+                review_id=idx % reviews + 1,
+                title_id=idx % reviews % titles + 1,
+                author_id=user_ids[idx % len(user_ids)],
+                text=f'Комментарий {idx + 1}',
+            )
+            for idx in range(self.options['comments'])
+        ))
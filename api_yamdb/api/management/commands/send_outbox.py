@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.mail import deliver_pending
+
+
+class Command(BaseCommand):
+    """Отправка писем из очереди исходящих."""
+    help = 'Command for sending queued outgoing mail'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Не завершаться, проверяя очередь каждые --interval секунд'
+        )
+        parser.add_argument('--interval', type=float, default=5)
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = self.drain(options['batch_size'])
+            if sent or failed:
+                self.stdout.write(
+                    f'Отправлено писем - {sent}, отложено - {failed}'
+                )
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def drain(self, batch_size):
+        sent = failed = 0
+        while True:
+            batch_sent, batch_failed = deliver_pending(batch_size)
+            sent += batch_sent
+            failed += batch_failed
+            if batch_sent + batch_failed < batch_size:
+                return sent, failed
@@ -0,0 +1,90 @@
+import glob
+import json
+import sys
+
+from django.core.management.base import BaseCommand
+
+from api.benchmarks import percentile
+
+
+def read_lines(path):
+    """Строки файла журнала вместе с ротированными файлами, - для stdin."""
+    if path == '-':
+        yield from sys.stdin
+        return
+    for filename in sorted(glob.glob(f'{glob.escape(path)}*')):
+        with open(filename, encoding='utf-8') as file:
+            yield from file
+
+
+def read_entries(path):
+    """Записи медленных запросов; остальные строки журнала пропускаются."""
+    for line in read_lines(path):
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(entry, dict) and 'fingerprint' in entry:
+            yield entry
+
+
+def aggregate(entries):
+    """Сводка по отпечаткам: количество, время, view и полные сканы."""
+    queries = {}
+    for entry in entries:
+        query = queries.setdefault(entry['fingerprint'], {
+            'query': entry['query'],
+            'durations': [],
+            'views': set(),
+            'full_scans': set(),
+            'plan': entry['plan'],
+        })
+        query['durations'].append(entry['duration_ms'])
+        if entry.get('view'):
+            query['views'].add(entry['view'])
+        query['full_scans'].update(entry.get('full_scans', ()))
+    return sorted(
+        queries.items(), key=lambda item: -sum(item[1]['durations'])
+    )
+
+
+class Command(BaseCommand):
+    """Сводка журнала медленных запросов по нормализованным отпечаткам.
+
+    Журнал пишется в stderr процесса, сохранять и ротировать его должно
+    окружение (systemd, docker, supervisor)."""
+    help = 'Command for aggregating the slow query log by fingerprint'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--log', default='-', help='Файл журнала, по умолчанию stdin'
+        )
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument(
+            '--plans', action='store_true', help='Вывести планы запросов'
+        )
+
+    def handle(self, *args, **options):
+        queries = aggregate(read_entries(options['log']))
+        for key, query in queries[:options['limit']]:
+            durations = query['durations']
+            self.stdout.write(
+                f'{key} count={len(durations)} '
+                f'total_ms={round(sum(durations), 3)} '
+                f'p95_ms={percentile(durations, 95)} '
+                f'max_ms={max(durations)}'
+            )
+            self.stdout.write(f'  {query["query"]}')
+            if query['views']:
+                views = ', '.join(sorted(query['views']))
+                self.stdout.write(f'  views: {views}')
+            if query['full_scans']:
+                self.stdout.write(self.style.WARNING(
+                    f'  full scans: {", ".join(sorted(query["full_scans"]))}'
+                ))
+            if options['plans']:
+                for detail in query['plan']:
+                    self.stdout.write(f'    {detail}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Отпечатков медленных запросов - {len(queries)}'
+        ))
@@ -0,0 +1,349 @@
+import atexit
+import hmac
+import json
+import os
+import threading
+import time
+from http import HTTPStatus
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+from .concurrency import HybridMiddleware, execute_wrapper
+from .timing import route_name
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+OVERFLOW = 'other'
+METHODS = ('GET', 'HEAD', 'OPTIONS', 'POST', 'PUT', 'PATCH', 'DELETE')
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+STATUSES = {str(code.value) for code in HTTPStatus}
+DEAD_PROCESSES = 'metrics_dead.json'
+
+
+class Registry:
+    """Значения метрик процесса и их выгрузка в формате Prometheus.
+
+    С METRICS_DIR каждый процесс раз в METRICS_FLUSH_INTERVAL секунд
+    записывает свои значения в файл каталога, а выгрузка суммирует файлы
+    всех процессов, поэтому /metrics одинаков в любом воркере gunicorn.
+    Каталог очищается при запуске сервера, файлы завершившихся воркеров
+    переносятся в общий файл (хуки в gunicorn.conf.py)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.metrics = {}
+        self.values = {}
+        self.flushed = time.monotonic()
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        self.values[metric.name] = {}
+
+    def update(self, metric, labels, update):
+        key = tuple(str(labels[name]) for name in metric.labelnames)
+        with self._lock:
+            series = self.values[metric.name]
+            if key not in series:
+                if len(series) >= settings.METRICS_MAX_SERIES:
+                    key = (OVERFLOW,) * len(key)
+                series.setdefault(key, metric.initial())
+            series[key] = update(series[key])
+        self.maybe_flush()
+
+    def reset(self):
+        self._lock = threading.Lock()
+        for series in self.values.values():
+            series.clear()
+
+    def path(self, pid=None):
+        return os.path.join(
+            settings.METRICS_DIR, f'metrics_{pid or os.getpid()}.json'
+        )
+
+    def maybe_flush(self):
+        if not settings.METRICS_DIR:
+            return
+        now = time.monotonic()
+        if now - self.flushed >= settings.METRICS_FLUSH_INTERVAL:
+            self.flushed = now
+            self.flush()
+
+    def flush(self):
+        """Атомарно перезаписывает файл процесса текущими значениями."""
+        if not settings.METRICS_DIR:
+            return
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        self.write(self.path(), self.snapshot())
+
+    def snapshot(self):
+        """Копия значений процесса."""
+        with self._lock:
+            return {
+                name: {key: self.metrics[name].copy(value)
+                       for key, value in series.items()}
+                for name, series in self.values.items()
+            }
+
+    @staticmethod
+    def write(path, values):
+        temporary = f'{path}.tmp'
+        with open(temporary, 'w') as file:
+            json.dump({
+                name: [[list(key), value] for key, value in series.items()]
+                for name, series in values.items()
+            }, file)
+        os.replace(temporary, path)
+
+    @staticmethod
+    def read(path):
+        try:
+            with open(path) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def merge(self, merged, data):
+        """Добавляет значения файла процесса к merged."""
+        for name, series in data.items():
+            metric = self.metrics.get(name)
+            if metric is None:
+                continue
+            for key, value in series:
+                key = tuple(key)
+                merged[name][key] = metric.merge(
+                    merged[name].get(key, metric.initial()), value
+                )
+        return merged
+
+    def clear(self):
+        """Удаляет файлы прошлого запуска, вызывается до старта воркеров."""
+        if not settings.METRICS_DIR or not os.path.isdir(settings.METRICS_DIR):
+            return
+        for filename in os.listdir(settings.METRICS_DIR):
+            if filename.startswith('metrics_'):
+                os.remove(os.path.join(settings.METRICS_DIR, filename))
+
+    def mark_process_dead(self, pid):
+        """Переносит значения завершившегося процесса в DEAD_PROCESSES.
+
+        Счётчики не уменьшаются, а новый процесс с тем же pid начинает
+        с пустого файла."""
+        if not settings.METRICS_DIR:
+            return
+        path = self.path(pid)
+        data = self.read(path)
+        if data is not None:
+            dead = os.path.join(settings.METRICS_DIR, DEAD_PROCESSES)
+            merged = {name: {} for name in self.metrics}
+            for values in (self.read(dead) or {}, data):
+                self.merge(merged, values)
+            self.write(dead, merged)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def collect(self):
+        """Значения, просуммированные по всем процессам."""
+        if not settings.METRICS_DIR:
+            return self.snapshot()
+        self.flush()
+        merged = {name: {} for name in self.metrics}
+        for filename in os.listdir(settings.METRICS_DIR):
+            if not filename.endswith('.json'):
+                continue
+            data = self.read(os.path.join(settings.METRICS_DIR, filename))
+            if data is not None:
+                self.merge(merged, data)
+        return merged
+
+    def render(self):
+        lines = []
+        values = self.collect()
+        for name, metric in sorted(self.metrics.items()):
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            for key, value in sorted(values[name].items()):
+                labels = dict(zip(metric.labelnames, key))
+                lines.extend(metric.samples(labels, value))
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+os.register_at_fork(after_in_child=registry.reset)
+atexit.register(registry.flush)
+
+
+def format_labels(labels):
+    escaped = (
+        (name, value.replace('\\', r'\\').replace('"', r'\"')
+         .replace('\n', r'\n'))
+        for name, value in labels.items()
+    )
+    pairs = ','.join(f'{name}="{value}"' for name, value in escaped)
+    return f'{{{pairs}}}' if pairs else ''
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Метрика с фиксированным набором меток, значения хранит registry."""
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        registry.register(self)
+
+    def initial(self):
+        return 0
+
+    def copy(self, value):
+        return value
+
+    def merge(self, value, other):
+        return value + other
+
+
+class Counter(Metric):
+    """Монотонно растущий счётчик."""
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        registry.update(self, labels, lambda value: value + amount)
+
+    def samples(self, labels, value):
+        return [f'{self.name}{format_labels(labels)} {format_value(value)}']
+
+
+class Histogram(Metric):
+    """Гистограмма: счётчики по интервалам, сумма и количество."""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=()):
+        self.buckets = tuple(buckets)
+        super().__init__(name, documentation, labelnames)
+
+    def initial(self):
+        return [0] * (len(self.buckets) + 1) + [0]
+
+    def copy(self, value):
+        return list(value)
+
+    def merge(self, value, other):
+        return [first + second for first, second in zip(value, other)]
+
+    def observe(self, amount, **labels):
+        bucket = next(
+            (idx for idx, bound in enumerate(self.buckets) if amount <= bound),
+            len(self.buckets)
+        )
+
+        def update(value):
+            value[bucket] += 1
+            value[-1] += amount
+            return value
+        registry.update(self, labels, update)
+
+    def samples(self, labels, value):
+        samples = []
+        count = 0
+        for bound, observed in zip(self.buckets + (float('inf'),), value):
+            count += observed
+            bucket_labels = {**labels, 'le': format_value(float(bound))}
+            samples.append(
+                f'{self.name}_bucket{format_labels(bucket_labels)} {count}'
+            )
+        samples.append(
+            f'{self.name}_sum{format_labels(labels)} {format_value(value[-1])}'
+        )
+        samples.append(f'{self.name}_count{format_labels(labels)} {count}')
+        return samples
+
+
+REQUEST_DURATION = Histogram(
+    'yamdb_http_request_duration_seconds',
+    'Время обработки запроса по маршрутам.',
+    ('route', 'method'), LATENCY_BUCKETS
+)
+REQUESTS = Counter(
+    'yamdb_http_requests_total',
+    'Количество ответов по маршрутам и кодам статуса.',
+    ('route', 'method', 'status')
+)
+DB_QUERIES = Histogram(
+    'yamdb_db_queries_per_request',
+    'Количество SQL-запросов на один HTTP-запрос.',
+    ('route',), QUERY_BUCKETS
+)
+CACHE_REQUESTS = Counter(
+    'yamdb_cache_requests_total',
+    'Обращения к кэшу ответов: result = hit | miss.',
+    ('route', 'result')
+)
+SIGNUPS = Counter(
+    'yamdb_signups_total',
+    'Регистрации: result = created | existing.',
+    ('result',)
+)
+TOKENS = Counter(
+    'yamdb_tokens_total',
+    'Запросы токена: result = issued | rejected.',
+    ('result',)
+)
+
+
+class QueryCounter:
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware(HybridMiddleware):
+    """Время ответа, коды статуса и число SQL-запросов по маршрутам.
+
+    Метки ограничены именами маршрутов urlconf, известными методами и
+    кодами HTTP, поэтому число рядов не зависит от URL запросов."""
+
+    def start(self, request, stack):
+        queries = QueryCounter()
+        stack.enter_context(execute_wrapper(queries))
+        return queries, time.perf_counter()
+
+    def finish(self, request, response, state):
+        queries, started = state
+        route = route_name(request)
+        method = request.method if request.method in METHODS else OVERFLOW
+        status = str(response.status_code)
+        REQUEST_DURATION.observe(
+            time.perf_counter() - started, route=route, method=method
+        )
+        REQUESTS.inc(
+            route=route, method=method,
+            status=status if status in STATUSES else OVERFLOW
+        )
+        DB_QUERIES.observe(queries.count, route=route)
+        return response
+
+
+def metrics_view(request):
+    """Метрики в текстовом формате Prometheus.
+
+    Требуется заголовок Authorization: Bearer <METRICS_TOKEN>; без
+    METRICS_TOKEN доступ закрыт."""
+    token = settings.METRICS_TOKEN
+    if not token or not hmac.compare_digest(
+        request.headers.get('Authorization', ''), f'Bearer {token}'
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
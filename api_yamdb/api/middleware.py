@@ -0,0 +1,88 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .cache import get_cache, is_shared_cache
+from .concurrency import HybridMiddleware
+from .database import replica_reads
+
+STICKY_KEY = 'api:db:sticky:{}'
+
+
+def client_key(request):
+    """Пользователь из JWT или сессия, для которых отслеживается запись."""
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    if header is not None:
+        raw_token = authentication.get_raw_token(header)
+        if raw_token is not None:
+            try:
+                token = authentication.get_validated_token(raw_token)
+                return f'user:{token[api_settings.USER_ID_CLAIM]}'
+            except (InvalidToken, KeyError):
+                return None
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    session = getattr(request, 'session', None)
+    if session is not None and session.session_key:
+        return f'session:{session.session_key}'
+    return None
+
+
+class ReplicaRoutingMiddleware(HybridMiddleware):
+    """Безопасные запросы читают с реплик, кроме короткого окна
+    DATABASE_STICKY_SECONDS после записи того же пользователя или сессии,
+    чтобы он сразу видел свои изменения.
+
+    Окно хранится в кэше API_CACHE_ALIAS, который должен быть общим для
+    всех процессов: с локальным кэшем запись, сделанная в одном воркере,
+    не видна другому, и он читает устаревшие данные с реплики."""
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if settings.DATABASE_REPLICAS and not is_shared_cache():
+            raise ImproperlyConfigured(
+                'DB_REPLICAS требует общего для процессов CACHE_BACKEND.'
+            )
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        key, allowed = self.read_state(request)
+        with replica_reads(allowed):
+            response = self.get_response(request)
+        self.stick(request, response, key)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+        key, allowed = await sync_to_async(self.read_state)(request)
+        with replica_reads(allowed):
+            response = await self.get_response(request)
+        await sync_to_async(self.stick)(request, response, key)
+        return response
+
+    def read_state(self, request):
+        key = client_key(request)
+        allowed = request.method in SAFE_METHODS and not (
+            key is not None
+            and get_cache().get(STICKY_KEY.format(key)) is not None
+        )
+        return key, allowed
+
+    def stick(self, request, response, key):
+        if request.method in SAFE_METHODS or response.status_code >= 400:
+            return
+        key = key or client_key(request)
+        if key is not None:
+            get_cache().set(
+                STICKY_KEY.format(key), 1, settings.DATABASE_STICKY_SECONDS
+            )
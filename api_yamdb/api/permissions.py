@@ -20,7 +20,7 @@ class AuthorOrModerPermission(permissions.BasePermission):
 
     def has_object_permission(self, request, view, obj):
         return (
-            obj.author == request.user
+            obj.author_id == request.user.id
             or request.method in permissions.SAFE_METHODS
             or request.user.is_authenticated
             and request.user.is_moderator or request.user.is_admin
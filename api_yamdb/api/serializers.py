@@ -1,10 +1,27 @@
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
-from rest_framework.validators import UniqueTogetherValidator
+from rest_framework.settings import api_settings
 
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.models import (
+    Category, Comment, Genre, Review, Title, TitleRanking, TitleStats, User
+)
 
+from .timing import TimedSerializerMixin
 
-class BaseRegistrationSerializer(serializers.Serializer):
+REVIEW_EXISTS_MESSAGE = (
+    'Cоздать другой отзыв на одно и то же произведение нельзя.'
+)
+
+
+class BaseSerializer(TimedSerializerMixin, serializers.Serializer):
+    """Базовый Serializer проекта."""
+
+
+class BaseModelSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Базовый ModelSerializer проекта."""
+
+
+class BaseRegistrationSerializer(BaseSerializer):
     """BaseSerializer для регистрации Пользователей и получения Токенов."""
     username = serializers.RegexField(
         regex=r'^[\w.@+-]+$',
@@ -52,7 +69,7 @@ class TokenSerializer(BaseRegistrationSerializer):
         )
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(BaseModelSerializer):
     """Serializer для работы с Пользователями."""
     class Meta:
         model = User
@@ -66,22 +83,12 @@ class UserSerializer(serializers.ModelSerializer):
         )
 
 
-class TitleIdDefault:
-    requires_context = True
-
-    def __call__(self, serializer_field):
-        view = serializer_field.context.get('view')
-        return view.kwargs.get('title_id')
-
-
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(BaseModelSerializer):
     """Serializer для работы с Отзывами."""
-    title_id = serializers.HiddenField(default=TitleIdDefault())
     author = serializers.CharField(
         read_only=True,
         default=serializers.CurrentUserDefault()
     )
-    title_id = serializers.HiddenField(default=TitleIdDefault())
 
     class Meta:
         model = Review
@@ -90,21 +97,29 @@ class ReviewSerializer(serializers.ModelSerializer):
             'text',
             'author',
             'score',
-            'title_id',
             'pub_date'
         )
-        validators = [
-            UniqueTogetherValidator(
-                queryset=Review.objects.all(),
-                fields=['author', 'title_id'],
-                message=(
-                    'Cоздать другой отзыв на одно и то же произведение нельзя.'
-                )
-            )
-        ]
-
 
-class CategorySerializer(serializers.ModelSerializer):
+    def create(self, validated_data):
+        """Вставка без предварительной проверки уникальности.
+
+        Повторный отзыв отклоняет ограничение once_review, ошибка
+        превращается в ответ 400."""
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            if not Review.objects.filter(
+                author=validated_data['author'],
+                title=validated_data['title']
+            ).exists():
+                raise
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [REVIEW_EXISTS_MESSAGE]
+            })
+
+
+class CategorySerializer(BaseModelSerializer):
     """Serializer для работы с Категориями."""
 
     class Meta:
@@ -115,7 +130,7 @@ class CategorySerializer(serializers.ModelSerializer):
         )
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(BaseModelSerializer):
     """Serializer для работы с Жанрами."""
 
     class Meta:
@@ -126,7 +141,7 @@ class GenreSerializer(serializers.ModelSerializer):
         )
 
 
-class TitlesRetrieveSerializer(serializers.ModelSerializer):
+class TitlesRetrieveSerializer(BaseModelSerializer):
     genre = GenreSerializer(many=True, read_only=True)
     category = CategorySerializer(read_only=True)
     rating = serializers.IntegerField(read_only=True)
@@ -144,7 +159,14 @@ class TitlesRetrieveSerializer(serializers.ModelSerializer):
         )
 
 
-class TitlesSerializer(serializers.ModelSerializer):
+class TitlesListSerializer(serializers.ListSerializer):
+    """Сериализация страницы Произведений одним сериализатором."""
+
+    def to_representation(self, data):
+        return TitlesRetrieveSerializer(many=True).to_representation(data)
+
+
+class TitlesSerializer(BaseModelSerializer):
     """Serializer для работы с Произведениями."""
     genre = serializers.SlugRelatedField(
         many=True,
@@ -168,13 +190,79 @@ class TitlesSerializer(serializers.ModelSerializer):
             'genre',
             'category'
         )
+        list_serializer_class = TitlesListSerializer
 
     def to_representation(self, instance):
         serializer = TitlesRetrieveSerializer(instance)
         return serializer.data
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class TitleBulkSerializer(BaseModelSerializer):
+    """Serializer элемента пакетной загрузки Произведений.
+
+    Слаги жанров и категории проверяются пакетно, без запроса на слаг."""
+    id = serializers.IntegerField(required=False)
+    genre = serializers.ListField(child=serializers.SlugField())
+    category = serializers.SlugField()
+
+    class Meta:
+        model = Title
+        fields = (
+            'id',
+            'name',
+            'year',
+            'description',
+            'genre',
+            'category'
+        )
+
+    def validate(self, attrs):
+        if self.partial and 'id' not in attrs:
+            raise serializers.ValidationError(
+                {'id': 'Обязательное поле.'}
+            )
+        if not self.partial:
+            attrs.pop('id', None)
+        return attrs
+
+
+class TitleStatsSerializer(BaseModelSerializer):
+    """Serializer для статистики Произведения."""
+    average = serializers.FloatField(read_only=True)
+    histogram = serializers.DictField(
+        child=serializers.IntegerField(),
+        read_only=True
+    )
+
+    class Meta:
+        model = TitleStats
+        fields = (
+            'review_count',
+            'average',
+            'histogram',
+            'comment_count'
+        )
+
+
+class TitleRankingSerializer(BaseModelSerializer):
+    """Serializer для места Произведения в рейтинге."""
+    id = serializers.IntegerField(source='title_id')
+    name = serializers.CharField(source='title.name')
+    year = serializers.IntegerField(source='title.year')
+
+    class Meta:
+        model = TitleRanking
+        fields = (
+            'position',
+            'id',
+            'name',
+            'year',
+            'average',
+            'review_count'
+        )
+
+
+class CommentSerializer(BaseModelSerializer):
     author = serializers.SlugRelatedField(
         read_only=True,
         slug_field='username'
@@ -0,0 +1,58 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from reviews.models import Category, Genre, Review, Title, User
+
+from .authentication import invalidate_user_state
+from .cache import bump_versions
+from .concurrency import install_request_wrappers
+from .database import configure_connection
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_categories(sender, **kwargs):
+    """Категория входит в ответы произведений."""
+    bump_versions('categories', 'titles')
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def invalidate_genres(sender, **kwargs):
+    """Жанры входят в ответы произведений."""
+    bump_versions('genres', 'titles')
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def invalidate_title(sender, instance, **kwargs):
+    bump_versions('titles', f'title:{instance.pk}')
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genres(sender, instance, action, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if isinstance(instance, Title):
+        bump_versions('titles', f'title:{instance.pk}')
+    else:
+        bump_versions('titles', *(f'title:{pk}' for pk in pk_set or ()))
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_title_rating(sender, instance, **kwargs):
+    bump_versions('titles', f'title:{instance.title_id}')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user(sender, instance, **kwargs):
+    invalidate_user_state(instance.pk)
+
+
+@receiver(connection_created)
+def tune_connection(sender, connection, **kwargs):
+    configure_connection(connection)
+    install_request_wrappers(connection)
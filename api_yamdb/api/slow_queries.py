@@ -0,0 +1,166 @@
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+
+from .benchmarks import explain_query_plan, full_scans
+from .concurrency import HybridMiddleware, execute_wrapper
+from .timing import route_name
+
+logger = logging.getLogger('api.slow_queries')
+
+STRING_PATTERN = re.compile(r"'(?:[^']|'')*'")
+NUMBER_PATTERN = re.compile(r'\b\d+(?:\.\d+)?\b')
+PLACEHOLDER_PATTERN = re.compile(r'%s|\?')
+IN_PATTERN = re.compile(r'\bIN \(\?(?:, \?)*\)', re.IGNORECASE)
+SPACE_PATTERN = re.compile(r'\s+')
+MAX_VIEWS = 10
+
+
+def fingerprint(sql):
+    """Отпечаток и нормализованный текст запроса.
+
+    Литералы и параметры заменяются на ?, списки IN любой длины - на
+    IN (...), поэтому запросы с разными значениями группируются вместе."""
+    normalized = STRING_PATTERN.sub('?', sql)
+    normalized = NUMBER_PATTERN.sub('?', normalized)
+    normalized = PLACEHOLDER_PATTERN.sub('?', normalized)
+    normalized = IN_PATTERN.sub('IN (...)', normalized)
+    normalized = SPACE_PATTERN.sub(' ', normalized).strip()
+    return hashlib.md5(normalized.encode()).hexdigest()[:16], normalized
+
+
+def view_path(request):
+    """Путь к view и действию viewset, обработавшим запрос."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+    view = getattr(match.func, 'cls', match.func)
+    path = f'{view.__module__}.{view.__qualname__}'
+    action = getattr(match.func, 'actions', {}).get(request.method.lower())
+    return f'{path}.{action}' if action else path
+
+
+class SlowQueryStats:
+    """Медленные запросы процесса, сгруппированные по отпечатку.
+
+    Хранит не больше SLOW_QUERY_MAX_FINGERPRINTS отпечатков, план
+    запрашивается один раз на отпечаток."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queries = OrderedDict()
+
+    def record(self, key, query, duration_ms, view):
+        with self._lock:
+            entry = self.queries.get(key)
+            if entry is None:
+                if len(self.queries) >= settings.SLOW_QUERY_MAX_FINGERPRINTS:
+                    self.queries.popitem(last=False)
+                entry = self.queries[key] = {
+                    'query': query,
+                    'count': 0,
+                    'total_ms': 0.0,
+                    'max_ms': 0.0,
+                    'views': [],
+                    'plan': None,
+                }
+            entry['count'] += 1
+            entry['total_ms'] += duration_ms
+            entry['max_ms'] = max(entry['max_ms'], duration_ms)
+            if view and view not in entry['views']:
+                if len(entry['views']) < MAX_VIEWS:
+                    entry['views'].append(view)
+            return entry
+
+    def summary(self):
+        with self._lock:
+            entries = [
+                {
+                    'fingerprint': key,
+                    **entry,
+                    'total_ms': round(entry['total_ms'], 3),
+                    'max_ms': round(entry['max_ms'], 3),
+                    'views': list(entry['views']),
+                    'full_scans': full_scans(entry['plan'] or []),
+                }
+                for key, entry in self.queries.items()
+            ]
+        return sorted(entries, key=lambda entry: -entry['total_ms'])
+
+    def reset(self):
+        with self._lock:
+            self.queries.clear()
+
+
+stats = SlowQueryStats()
+
+
+class SlowQueryWrapper:
+    """Обёртка execute_wrapper: пишет запросы дольше SLOW_QUERY_MS в лог.
+
+    Параметры запроса в лог не попадают, только SQL с плейсхолдерами."""
+
+    def __init__(self, request=None):
+        self.request = request
+        self.explaining = False
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration_ms = (time.perf_counter() - started) * 1000
+        if duration_ms >= settings.SLOW_QUERY_MS and not self.explaining:
+            self.report(sql, params, many, context, duration_ms)
+        return result
+
+    def report(self, sql, params, many, context, duration_ms):
+        key, query = fingerprint(sql)
+        view = view_path(self.request)
+        entry = stats.record(key, query, duration_ms, view)
+        if entry['plan'] is None:
+            entry['plan'] = [] if many else self.explain(
+                context['connection'], sql, params
+            )
+        logger.warning(json.dumps({
+            'fingerprint': key,
+            'duration_ms': round(duration_ms, 3),
+            'database': context['connection'].alias,
+            'view': view,
+            'route': route_name(self.request) if self.request else None,
+            'sql': sql,
+            'query': query,
+            'plan': entry['plan'],
+            'full_scans': full_scans(entry['plan']),
+        }, ensure_ascii=False))
+
+    def explain(self, connection, sql, params):
+        if not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+            return []
+        self.explaining = True
+        try:
+            if not connection.in_atomic_block:
+                return explain_query_plan(sql, params, connection)
+            with transaction.atomic(using=connection.alias):
+                return explain_query_plan(sql, params, connection)
+        except DatabaseError:
+            return []
+        finally:
+            self.explaining = False
+
+
+def log_slow_queries(request=None):
+    """Включает журнал медленных запросов на всех соединениях запроса."""
+    return execute_wrapper(SlowQueryWrapper(request))
+
+
+class SlowQueryMiddleware(HybridMiddleware):
+    """Журнал медленных запросов с view, планом и отпечатком."""
+
+    def start(self, request, stack):
+        stack.enter_context(log_slow_queries(request))
@@ -0,0 +1,238 @@
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+from .concurrency import HybridMiddleware, execute_wrapper
+
+logger = logging.getLogger('api.timing')
+current = ContextVar('request_timings', default=None)
+
+BOUNDS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+SECTIONS = ('db', 'serializer', 'permissions', 'view')
+
+
+class RequestTimings:
+    """Время по разделам обработки одного запроса и число SQL-запросов."""
+
+    def __init__(self):
+        self.durations = defaultdict(float)
+        self.queries = 0
+        self.active = set()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.durations['db'] += time.perf_counter() - started
+            self.queries += 1
+
+    def ms(self, name):
+        return round(self.durations[name] * 1000, 3)
+
+
+@contextmanager
+def section(name):
+    """Учитывает время блока в разделе name текущего запроса.
+
+    Вложенные блоки одного раздела (вложенные сериализаторы) не
+    учитываются повторно."""
+    timings = current.get()
+    if timings is None or name in timings.active:
+        yield
+        return
+    timings.active.add(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.durations[name] += time.perf_counter() - started
+        timings.active.discard(name)
+
+
+class RollingHistogram:
+    """Гистограмма задержек за последние window секунд.
+
+    Окно делится на slots интервалов; устаревшие интервалы отбрасываются
+    при записи."""
+
+    def __init__(self, window, slots):
+        self.slot_seconds = window / slots
+        self.slots_count = slots
+        self.slots = {}
+
+    def observe(self, value_ms, queries, now):
+        index = int(now // self.slot_seconds)
+        slot = self.slots.get(index)
+        if slot is None:
+            slot = self.slots[index] = {
+                'buckets': [0] * (len(BOUNDS_MS) + 1),
+                'count': 0,
+                'sum_ms': 0.0,
+                'queries': 0,
+            }
+            for old in [key for key in self.slots
+                        if key <= index - self.slots_count]:
+                del self.slots[old]
+        bucket = next(
+            (idx for idx, bound in enumerate(BOUNDS_MS) if value_ms <= bound),
+            len(BOUNDS_MS)
+        )
+        slot['buckets'][bucket] += 1
+        slot['count'] += 1
+        slot['sum_ms'] += value_ms
+        slot['queries'] += queries
+
+    def snapshot(self, now):
+        first = int(now // self.slot_seconds) - self.slots_count + 1
+        buckets = [0] * (len(BOUNDS_MS) + 1)
+        count = queries = 0
+        total = 0.0
+        for index, slot in self.slots.items():
+            if index < first:
+                continue
+            for idx, value in enumerate(slot['buckets']):
+                buckets[idx] += value
+            count += slot['count']
+            total += slot['sum_ms']
+            queries += slot['queries']
+        if not count:
+            return None
+        return {
+            'count': count,
+            'avg_ms': round(total / count, 3),
+            'avg_queries': round(queries / count, 2),
+            'p50_ms': self.quantile(buckets, count, 0.5),
+            'p95_ms': self.quantile(buckets, count, 0.95),
+            'p99_ms': self.quantile(buckets, count, 0.99),
+            'buckets': {
+                str(bound): value
+                for bound, value in zip(BOUNDS_MS + ('+Inf',), buckets)
+            },
+        }
+
+    @staticmethod
+    def quantile(buckets, count, quantile):
+        """Верхняя граница интервала, в который попадает квантиль."""
+        seen = 0
+        for bound, value in zip(BOUNDS_MS, buckets):
+            seen += value
+            if seen >= quantile * count:
+                return bound
+        return None
+
+
+class RouteHistograms:
+    """Скользящие гистограммы задержек по именам маршрутов в процессе."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.routes = {}
+
+    def observe(self, route, value_ms, queries):
+        now = time.monotonic()
+        with self._lock:
+            histogram = self.routes.get(route)
+            if histogram is None:
+                histogram = self.routes[route] = RollingHistogram(
+                    settings.API_TIMING_WINDOW,
+                    settings.API_TIMING_WINDOW_SLOTS
+                )
+            histogram.observe(value_ms, queries, now)
+
+    def snapshot(self):
+        now = time.monotonic()
+        with self._lock:
+            snapshots = {
+                route: histogram.snapshot(now)
+                for route, histogram in self.routes.items()
+            }
+        return {
+            route: snapshot for route, snapshot in sorted(snapshots.items())
+            if snapshot is not None
+        }
+
+    def reset(self):
+        with self._lock:
+            self.routes.clear()
+
+
+histograms = RouteHistograms()
+
+
+def route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None or not match.url_name:
+        return 'unmatched'
+    return match.url_name
+
+
+class TimingMiddleware(HybridMiddleware):
+    """Время SQL-запросов, сериализации, проверки прав и view.
+
+    Результат отдаётся в заголовке Server-Timing, пишется в лог api.timing
+    строкой JSON и попадает в гистограммы /api/v1/_metrics/."""
+
+    def start(self, request, stack):
+        timings = RequestTimings()
+        stack.callback(current.reset, current.set(timings))
+        stack.enter_context(execute_wrapper(timings))
+        return timings, time.perf_counter()
+
+    def finish(self, request, response, state):
+        timings, started = state
+        total_ms = round((time.perf_counter() - started) * 1000, 3)
+        route = route_name(request)
+        histograms.observe(route, total_ms, timings.queries)
+        response['Server-Timing'] = ', '.join(
+            [f'db;dur={timings.ms("db")};desc="{timings.queries} queries"']
+            + [f'{name};dur={timings.ms(name)}' for name in SECTIONS[1:]]
+            + [f'total;dur={total_ms}']
+        )
+        logger.info(json.dumps({
+            'route': route,
+            'method': request.method,
+            'status': response.status_code,
+            'total_ms': total_ms,
+            'db_queries': timings.queries,
+            **{f'{name}_ms': timings.ms(name) for name in SECTIONS},
+        }))
+        return response
+
+
+class TimedViewMixin:
+    """Учитывает время view и проверки прав в TimingMiddleware.
+
+    Подключается через базовые view в api.views."""
+
+    def dispatch(self, request, *args, **kwargs):
+        with section('view'):
+            return super().dispatch(request, *args, **kwargs)
+
+    def check_permissions(self, request):
+        with section('permissions'):
+            super().check_permissions(request)
+
+    def check_object_permissions(self, request, obj):
+        with section('permissions'):
+            super().check_object_permissions(request, obj)
+
+
+class TimedSerializerMixin:
+    """Учитывает время сериализации и валидации в TimingMiddleware.
+
+    Подключается через базовые сериализаторы в api.serializers."""
+
+    def to_representation(self, instance):
+        with section('serializer'):
+            return super().to_representation(instance)
+
+    def run_validation(self, *args, **kwargs):
+        with section('serializer'):
+            return super().run_validation(*args, **kwargs)
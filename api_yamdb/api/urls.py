@@ -1,10 +1,12 @@
+from django.conf import settings
 from django.urls import include, path
 
 from rest_framework.routers import DefaultRouter
 
+from .async_views import async_routes
 from .views import (CategoriesViewSet, CommentViewSet, GenresViewSet,
-                    RegistrationView, ReviewsViewSet, TitlesViewSet, TokenView,
-                    UsersViewSet)
+                    LeaderboardViewSet, MetricsView, RegistrationView,
+                    ReviewsViewSet, TitlesViewSet, TokenView, UsersViewSet)
 
 v1_router = DefaultRouter()
 
@@ -17,9 +19,22 @@ v1_router.register(
     ReviewsViewSet, basename='reviews'
 )
 v1_router.register(
-    r'titles/(?P<title_id>[\d]+)/reviews/(?P<review_id>[\w]+)/comments',
+    r'titles/(?P<title_id>[\d]+)/reviews/(?P<review_id>[\d]+)/comments',
     CommentViewSet, basename='comments'
 )
+v1_router.register(
+    r'leaderboards/(?P<board>top-rated|most-reviewed)',
+    LeaderboardViewSet, basename='leaderboards'
+)
+
+ASYNC_VIEWSETS = (
+    CategoriesViewSet, GenresViewSet, TitlesViewSet, ReviewsViewSet,
+    CommentViewSet
+)
+
+v1_urls = v1_router.urls
+if settings.ASYNC_READ_VIEWS:
+    v1_urls = async_routes(v1_urls, ASYNC_VIEWSETS)
 
 urlpatterns_auth = [
     path('token/', TokenView.as_view(), name='token'),
@@ -27,6 +42,7 @@ urlpatterns_auth = [
 ]
 
 urlpatterns = [
-    path('v1/', include(v1_router.urls)),
+    path('v1/', include(v1_urls)),
     path('v1/auth/', include(urlpatterns_auth)),
+    path('v1/_metrics/', MetricsView.as_view(), name='metrics'),
 ]
@@ -1,33 +1,69 @@
-from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
 from django.conf import settings
+from django.db import IntegrityError, OperationalError, transaction
+from django.db.models import Q
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, mixins, permissions, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import AccessToken
 
 from reviews.filters import TitleFilter
-from reviews.models import Category, Genre, Review, Title, User
+from reviews.models import (
+    Category, Genre, Review, Title, TitleRanking, TitleStats, User
+)
 
+from .bulk import TitleBulk
+from .cache import (
+    CachedListMixin, CachedRetrieveMixin, ConditionalGetMixin
+)
+from .confirmation import (
+    check_confirmation_code, make_confirmation_code
+)
+from .mail import enqueue_mail
+from .metrics import SIGNUPS, TOKENS
+from .pagination import FeedPagination
 from .permissions import (
     AuthorOrModerPermission, IsAdminOrReadOnlyPermission, IsAdminPermission
 )
 from .serializers import (
     CategorySerializer, CommentSerializer, GenreSerializer,
-    RegistrationSerializer, ReviewSerializer, TitlesSerializer,
+    RegistrationSerializer, ReviewSerializer, TitleRankingSerializer,
+    TitleStatsSerializer, TitlesRetrieveSerializer, TitlesSerializer,
     TokenSerializer, UserSerializer
 )
+from .slow_queries import stats as slow_query_stats
+from .timing import TimedViewMixin, histograms
+
+
+class BaseAPIView(TimedViewMixin, APIView):
+    """Базовый APIView проекта."""
+
+
+class BaseViewSet(TimedViewMixin, viewsets.GenericViewSet):
+    """Базовый viewset проекта, действия подключаются миксинами DRF."""
+
+
+class BaseModelViewSet(
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.UpdateModelMixin,
+    mixins.DestroyModelMixin,
+    mixins.ListModelMixin,
+    BaseViewSet
+):
+    """ModelViewSet на BaseViewSet."""
 
 
 class CategoriesGenresBaseMixin(
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.DestroyModelMixin,
-    viewsets.GenericViewSet
+    BaseViewSet
 ):
     """Миксин для Жанров и Категорий.
 
@@ -38,7 +74,7 @@ class CategoriesGenresBaseMixin(
     search_fields = ('name',)
 
 
-class RegistrationView(APIView):
+class RegistrationView(BaseAPIView):
     """Регистрация пользователя и отправка confirmation_code на email."""
     serializer_class = RegistrationSerializer
     queryset = User.objects.all()
@@ -49,49 +85,67 @@ class RegistrationView(APIView):
 
         username = serializer.validated_data.get('username')
         email = serializer.validated_data.get('email')
-        existing_user = User.objects.filter(username=username).first()
-
-        if existing_user and existing_user.email != email:
-            return Response(
-                f'Указан не верный email для {existing_user}!',
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        if User.objects.filter(username=username).exists():
-            return Response(
-                request.data,
-                status=status.HTTP_200_OK
-            )
-        if existing_user is None and User.objects.filter(email=email).exists():
-            return Response(
-                f'Пользователь с почтой {email} уже зарегистрирован!',
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        if User.objects.filter(email=email).exists():
-            return Response(
-                request.data,
-                status=status.HTTP_200_OK
-            )
-        user = User.objects.create_user(username, email)
-        confirmation_code = default_token_generator.make_token(user)
-        user.confirmation_code = confirmation_code
-        user.save()
-
-        send_mail(
+        user_id, error = self.check_existing(username, email)
+        if error is not None:
+            return error
+
+        result = 'existing'
+        if user_id is None:
+            result = 'created'
+            try:
+                with transaction.atomic():
+                    user_id = User.objects.create_user(username, email).pk
+            except IntegrityError:
+                user_id, error = self.check_existing(username, email)
+                if error is not None or user_id is None:
+                    return error or Response(
+                        'Пользователь с таким username или email уже '
+                        'существует!',
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+
+        enqueue_mail(
             subject='Confirmation code for token',
             message=f'Вы сделали запрос на регистрацию на портале YaMDb.\n\n'
-                    f'Ваш логин: {user.username} \n'
-                    f'Ваш код подтверждения: {confirmation_code}',
-            from_email=settings.EMAIL,
-            recipient_list=[user.email],
-            fail_silently=True,
+                    f'Ваш логин: {username} \n'
+                    f'Ваш код подтверждения: '
+                    f'{make_confirmation_code(user_id)}',
+            recipient_list=[email],
         )
+        SIGNUPS.inc(result=result)
         return Response(
             serializer.data,
             status=status.HTTP_200_OK
         )
 
+    def check_existing(self, username, email):
+        """Id зарегистрированного пользователя или ответ об ошибке.
+
+        Занятость username и email проверяется одним запросом к базе."""
+        existing = {
+            existing_username: (user_id, existing_email)
+            for user_id, existing_username, existing_email
+            in User.objects.filter(
+                Q(username=username) | Q(email=email)
+            ).values_list('id', 'username', 'email')
+        }
+        if username in existing:
+            user_id, existing_email = existing[username]
+            if existing_email != email:
+                return None, Response(
+                    f'Указан не верный email для {username}!',
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            return user_id, None
+        if existing:
+            return None, Response(
+                f'Пользователь с почтой {email} уже зарегистрирован!',
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return None, None
+
 
-class TokenView(APIView):
+class TokenView(BaseAPIView):
     """Получение токена по username и confirmation_code."""
     permission_classes = (permissions.AllowAny,)
 
@@ -101,19 +155,21 @@ class TokenView(APIView):
         username = serializer.data['username']
         user = get_object_or_404(User, username=username)
         confirmation_code = serializer.data['confirmation_code']
-        if not default_token_generator.check_token(user, confirmation_code):
+        if not check_confirmation_code(user.pk, confirmation_code):
+            TOKENS.inc(result='rejected')
             return Response(
                 'Указан не корректный "confirmation_code"',
                 status=status.HTTP_400_BAD_REQUEST
             )
         token = AccessToken.for_user(user)
+        TOKENS.inc(result='issued')
         return Response(
             {'token': str(token)},
             status=status.HTTP_200_OK
         )
 
 
-class UsersViewSet(viewsets.ModelViewSet):
+class UsersViewSet(BaseModelViewSet):
     """Работа с полями Пользователей."""
     serializer_class = UserSerializer
     queryset = User.objects.all()
@@ -131,7 +187,7 @@ class UsersViewSet(viewsets.ModelViewSet):
     )
     def get_about_me(self, request):
         serializer = UserSerializer(
-            request.user,
+            User.objects.get(pk=request.user.pk),
             data=request.data,
             partial=True
         )
@@ -145,23 +201,35 @@ class UsersViewSet(viewsets.ModelViewSet):
         )
 
 
-class CategoriesViewSet(CategoriesGenresBaseMixin):
+class CategoriesViewSet(CachedListMixin, CategoriesGenresBaseMixin):
     """Работа с Категориями."""
+    list_cache_versions = ('categories',)
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = (IsAdminOrReadOnlyPermission,)
 
 
-class GenresViewSet(CategoriesGenresBaseMixin):
+class GenresViewSet(CachedListMixin, CategoriesGenresBaseMixin):
     """Работа с Жанрами."""
+    list_cache_versions = ('genres',)
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
     permission_classes = (IsAdminOrReadOnlyPermission,)
 
 
-class TitlesViewSet(viewsets.ModelViewSet):
+class TitlesViewSet(
+    ConditionalGetMixin, CachedListMixin, CachedRetrieveMixin,
+    BaseModelViewSet
+):
     """Работа с Произведениями."""
-    queryset = Title.objects.all()
+    conditional_actions = ('retrieve', 'stats')
+    title_lookup_kwarg = 'pk'
+    list_cache_versions = ('titles', 'categories', 'genres')
+    detail_cache_versions = ('categories', 'genres')
+    detail_cache_prefix = 'title'
+    queryset = Title.objects.select_related(
+        'category'
+    ).prefetch_related('genre')
     serializer_class = TitlesSerializer
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilter
@@ -180,17 +248,91 @@ class TitlesViewSet(viewsets.ModelViewSet):
         )
         serializer.is_valid(raise_exception=True)
         self.perform_update(serializer)
+        instance._prefetched_objects_cache = {}
         return Response(serializer.data)
 
+    @action(methods=['POST', 'PATCH'], detail=False)
+    def bulk(self, request):
+        """Пакетное создание (POST) и изменение (PATCH) Произведений."""
+        bulk = TitleBulk(request.data, partial=request.method == 'PATCH')
+        if not bulk.is_valid():
+            return Response(bulk.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            ids = bulk.save()
+        except (IntegrityError, OperationalError):
+            return Response(
+                'Произведения изменены параллельным запросом, '
+                'повторите запрос.',
+                status=status.HTTP_409_CONFLICT
+            )
+        serializer = TitlesRetrieveSerializer(
+            self.get_queryset().filter(pk__in=ids), many=True
+        )
+        return Response(
+            serializer.data,
+            status=status.HTTP_200_OK if bulk.partial
+            else status.HTTP_201_CREATED
+        )
+
+    @action(methods=['GET'], detail=True)
+    def stats(self, request, pk=None):
+        """Статистика отзывов и комментариев из материализованной таблицы."""
+        return self.conditional_response(self.get_stats, request, pk=pk)
+
+    def get_stats(self, request, pk):
+        try:
+            stats = TitleStats.objects.get(title_id=pk)
+        except (TitleStats.DoesNotExist, TypeError, ValueError):
+            raise Http404
+        return Response(TitleStatsSerializer(stats).data)
+
+
+class LeaderboardViewSet(
+    CachedListMixin, mixins.ListModelMixin, BaseViewSet
+):
+    """Рейтинги Произведений: общий или по category/genre из query string.
 
-class WithTitleViewSet(viewsets.ModelViewSet):
+    Читает первые limit строк предрасчитанной таблицы без агрегации."""
+    serializer_class = TitleRankingSerializer
+    pagination_class = None
+    list_cache_versions = ('leaderboards',)
+
+    def get_queryset(self):
+        params = self.request.query_params
+        scope, scope_id = 'all', 0
+        for model, name in ((Category, 'category'), (Genre, 'genre')):
+            if name in params:
+                scope = name
+                scope_id = get_object_or_404(
+                    model.objects.only('id'), slug=params[name]
+                ).pk
+                break
+        try:
+            limit = int(params.get('limit', settings.LEADERBOARD_SIZE))
+        except ValueError:
+            raise ValidationError({'limit': 'Ожидается целое число.'})
+        limit = min(max(limit, 1), settings.LEADERBOARD_SIZE)
+        return TitleRanking.objects.filter(
+            board=self.kwargs['board'], scope=scope, scope_id=scope_id
+        ).select_related('title').order_by('position')[:limit]
+
+
+class WithTitleViewSet(ConditionalGetMixin, BaseModelViewSet):
     permission_classes = (AuthorOrModerPermission,)
+    pagination_class = FeedPagination
     http_method_names = ['get', 'post', 'patch', 'delete']
 
     def get_title(self):
-        title_id = self.kwargs.get('title_id')
-        title = get_object_or_404(Title, pk=title_id)
-        return title
+        """Произведение из URL: проверка существования без лишних полей."""
+        if not hasattr(self, '_title'):
+            self._title = get_object_or_404(
+                Title.objects.only('id', 'version', 'updated'),
+                pk=self.kwargs.get('title_id')
+            )
+        return self._title
+
+    def get_title_state(self):
+        return self.get_title()
 
 
 class ReviewsViewSet(WithTitleViewSet):
@@ -204,7 +346,7 @@ class ReviewsViewSet(WithTitleViewSet):
         )
 
     def get_queryset(self):
-        return self.get_title().reviews.all()
+        return self.get_title().reviews.select_related('author')
 
 
 class CommentViewSet(WithTitleViewSet):
@@ -212,16 +354,46 @@ class CommentViewSet(WithTitleViewSet):
     serializer_class = CommentSerializer
 
     def get_review(self):
-        review_id = self.kwargs.get('review_id')
-        review = get_object_or_404(Review, pk=review_id)
-        return review
+        """Отзыв из URL вместе с произведением одним запросом.
+
+        Отзыв ищется только среди отзывов произведения из URL."""
+        if not hasattr(self, '_review'):
+            self._review = get_object_or_404(
+                Review.objects.select_related('title').only(
+                    'id', 'title__id', 'title__version', 'title__updated'
+                ),
+                pk=self.kwargs.get('review_id'),
+                title_id=self.kwargs.get('title_id')
+            )
+        return self._review
+
+    def get_title(self):
+        return self.get_review().title
 
     def get_queryset(self):
-        return self.get_review().comments.all()
+        return self.get_review().comments.select_related('author')
 
     def perform_create(self, serializer):
+        review = self.get_review()
         serializer.save(
             author=self.request.user,
-            review=self.get_review(),
-            title=self.get_title()
+            review=review,
+            title=review.title
         )
+
+
+class MetricsView(BaseAPIView):
+    """Скользящие гистограммы времени ответа по маршрутам и медленные
+    запросы.
+
+    Гистограммы заполняются при включённом TimingMiddleware; данные
+    своего процесса."""
+    permission_classes = (IsAdminPermission,)
+
+    def get(self, request):
+        return Response({
+            'enabled': settings.API_TIMING,
+            'window_seconds': settings.API_TIMING_WINDOW,
+            'routes': histograms.snapshot(),
+            'slow_queries': slow_query_stats.summary(),
+        })
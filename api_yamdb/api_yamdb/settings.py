@@ -40,7 +40,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 5,
@@ -54,8 +54,10 @@ SIMPLE_JWT = {
 }
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'api.middleware.ReplicaRoutingMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -63,6 +65,64 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+API_TIMING = os.getenv('API_TIMING', 'false').lower() == 'true'
+
+if API_TIMING:
+    MIDDLEWARE.insert(1, 'api.timing.TimingMiddleware')
+
+API_TIMING_WINDOW = 300
+
+API_TIMING_WINDOW_SLOTS = 5
+
+METRICS_DIR = os.getenv('PROMETHEUS_MULTIPROC_DIR', '')
+
+METRICS_FLUSH_INTERVAL = 1
+
+METRICS_MAX_SERIES = 500
+
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+ASYNC_READ_VIEWS = os.getenv('ASYNC_READ_VIEWS', 'false').lower() == 'true'
+
+ASYNC_DB_WORKERS = int(os.getenv('ASYNC_DB_WORKERS', 8))
+
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 0))
+
+if SLOW_QUERY_MS:
+    MIDDLEWARE.insert(1, 'api.slow_queries.SlowQueryMiddleware')
+
+SLOW_QUERY_MAX_FINGERPRINTS = 500
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'timing': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'message',
+        },
+        'slow_queries': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        'api.timing': {
+            'handlers': ['timing'],
+            'level': os.getenv('API_TIMING_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+        'api.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
 ROOT_URLCONF = 'api_yamdb.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
@@ -85,13 +145,87 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
+DB_PROFILE = os.getenv('DB_PROFILE', 'sqlite')
+
+CONN_MAX_AGE = int(os.getenv('CONN_MAX_AGE', 60))
+
+DATABASE_PROFILES = {
+    'sqlite': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.getenv('DB_NAME', os.path.join(BASE_DIR, 'db.sqlite3')),
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+    },
+    'postgres': {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.getenv('POSTGRES_DB', 'yamdb'),
+        'USER': os.getenv('POSTGRES_USER', 'yamdb'),
+        'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+        'HOST': os.getenv('DB_HOST', 'localhost'),
+        'PORT': os.getenv('DB_PORT', '5432'),
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+        # PgBouncer в режиме transaction не поддерживает серверные курсоры.
+        'DISABLE_SERVER_SIDE_CURSORS': os.getenv('DB_POOLER') == 'pgbouncer',
+    },
+}
+
 DATABASES = {
+    'default': DATABASE_PROFILES[DB_PROFILE],
+}
+
+# Реплики для чтения: пути к файлам SQLite или хосты PostgreSQL через
+# запятую. Репликация данных выполняется вне приложения.
+DATABASE_REPLICAS = []
+
+for number, replica in enumerate(
+    filter(None, os.getenv('DB_REPLICAS', '').split(',')), 1
+):
+    DATABASES[f'replica_{number}'] = {
+        **DATABASES['default'],
+        'NAME' if DB_PROFILE == 'sqlite' else 'HOST': replica.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{number}')
+
+DATABASE_REPLICA_APPS = ('reviews',)
+
+DATABASE_ROUTERS = ['api.database.ReplicaRouter']
+
+DATABASE_STICKY_SECONDS = 5
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 256 * 1024 * 1024,
+    'busy_timeout': 5000,
+}
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'yamdb'),
     }
 }
 
+API_CACHE_ALIAS = 'default'
+
+API_CACHE_TIMEOUT = 300
+
+AUTH_USER_CACHE_TIMEOUT = 60
+
+CONFIRMATION_CODE_TIMEOUT = 60 * 60 * 24
+
+TITLES_BULK_MAX_SIZE = 1000
+
+LEADERBOARD_SIZE = 100
+
+LEADERBOARD_MIN_REVIEWS = 3
+
+TITLE_SEARCH_POSTGRES = os.getenv('TITLE_SEARCH_POSTGRES', 'trigram')
+
+TITLE_SEARCH_CONFIG = 'russian'
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -124,3 +258,9 @@ STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static/'),)
 AUTH_USER_MODEL = 'reviews.User'
 
 EMAIL = 'robot@yamdb.pro'
+
+MAIL_OUTBOX_MAX_ATTEMPTS = 5
+
+MAIL_OUTBOX_RETRY_DELAY = 60
+
+MAIL_OUTBOX_MAX_RETRY_DELAY = 3600
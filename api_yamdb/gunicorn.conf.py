@@ -0,0 +1,19 @@
+"""Хуки gunicorn для метрик Prometheus нескольких воркеров.
+
+gunicorn читает файл из текущего каталога:
+gunicorn api_yamdb.wsgi --workers 4"""
+import os
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+
+
+def on_starting(server):
+    from api.metrics import registry
+
+    registry.clear()
+
+
+def child_exit(server, worker):
+    from api.metrics import registry
+
+    registry.mark_process_dead(worker.pid)
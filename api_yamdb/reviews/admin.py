@@ -1,6 +1,9 @@
 from django.contrib import admin
 
-from .models import Category, Comment, Genre, Review, Title, User
+from .models import (
+    Category, Comment, Genre, OutgoingMail, Review, Title, TitleRanking,
+    TitleStats, User
+)
 
 
 @admin.register(User)
@@ -26,7 +29,8 @@ class TitleAdmin(admin.ModelAdmin):
         'name',
         'year',
         'description',
-        'category'
+        'category',
+        'rating'
     )
     list_editable = (
         'name',
@@ -87,3 +91,45 @@ class CommentAdmin(admin.ModelAdmin):
     list_editable = (
         'text',
     )
+
+
+@admin.register(OutgoingMail)
+class OutgoingMailAdmin(admin.ModelAdmin):
+    list_display = (
+        'id',
+        'recipient',
+        'subject',
+        'created',
+        'attempts',
+        'sent'
+    )
+    list_filter = (
+        'sent',
+    )
+
+
+@admin.register(TitleStats)
+class TitleStatsAdmin(admin.ModelAdmin):
+    list_display = (
+        'title',
+        'review_count',
+        'score_sum',
+        'comment_count'
+    )
+
+
+@admin.register(TitleRanking)
+class TitleRankingAdmin(admin.ModelAdmin):
+    list_display = (
+        'board',
+        'scope',
+        'scope_id',
+        'position',
+        'title',
+        'average',
+        'review_count'
+    )
+    list_filter = (
+        'board',
+        'scope',
+    )
@@ -7,3 +7,14 @@ ROLE_CHOICES = [
 BASE_LENGTH = 256
 BASE_EMAIL_LENGTH = 254
 DEFAULT_STR_LENGTH = 25
+SCORES = range(1, 11)
+
+LEADERBOARD_CHOICES = [
+    ('top-rated', 'Лучшие по рейтингу'),
+    ('most-reviewed', 'Больше всего отзывов'),
+]
+LEADERBOARD_SCOPE_CHOICES = [
+    ('all', 'Все произведения'),
+    ('category', 'Категория'),
+    ('genre', 'Жанр'),
+]
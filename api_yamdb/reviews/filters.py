@@ -1,21 +1,14 @@
 from django_filters import rest_framework as filters
 
 from .models import Title
+from .search import search_titles
 
 
 class TitleFilter(filters.FilterSet):
     """Фильтр для Произведений."""
-    category = filters.CharFilter(
-        field_name='category__slug',
-        lookup_expr='icontains'
-    )
-    genre = filters.CharFilter(
-        field_name='genre__slug',
-        lookup_expr='icontains'
-    )
-    name = filters.CharFilter(
-        lookup_expr='icontains'
-    )
+    category = filters.CharFilter(field_name='category__slug')
+    genre = filters.CharFilter(field_name='genre__slug')
+    name = filters.CharFilter(method='search_name')
     year = filters.NumberFilter()
 
     class Meta:
@@ -26,3 +19,6 @@ class TitleFilter(filters.FilterSet):
             'category',
             'name'
         )
+
+    def search_name(self, queryset, name, value):
+        return search_titles(queryset, value)
@@ -0,0 +1,57 @@
+import heapq
+from collections import defaultdict
+
+from django.db import transaction
+
+from .models import Title, TitleRanking
+
+
+def rank_key(board):
+    """Ключ сортировки строк (id, category_id, sum, count) для рейтинга."""
+    if board == 'top-rated':
+        return lambda row: (-row[2] / row[3], -row[3], row[0])
+    return lambda row: (-row[3], -row[2] / row[3], row[0])
+
+
+def refresh_leaderboards(size, min_reviews, batch_size=1000):
+    """Пересчитывает таблицу рейтингов по сохранённым оценкам произведений.
+
+    Для каждого рейтинга сохраняются первые size произведений среди всех,
+    в каждой категории и каждом жанре; учитываются только произведения
+    не менее чем с min_reviews отзывами. Возвращает число строк."""
+    min_reviews = max(min_reviews, 1)
+    rows = list(Title.objects.filter(
+        rating_count__gte=min_reviews
+    ).values_list('id', 'category_id', 'rating_sum', 'rating_count'))
+    by_id = {row[0]: row for row in rows}
+    scopes = defaultdict(list)
+    scopes['all', 0] = rows
+    for row in rows:
+        if row[1] is not None:
+            scopes['category', row[1]].append(row)
+    for title_id, genre_id in Title.genre.through.objects.filter(
+        title__rating_count__gte=min_reviews
+    ).values_list('title_id', 'genre_id'):
+        if title_id in by_id:
+            scopes['genre', genre_id].append(by_id[title_id])
+
+    rankings = [
+        TitleRanking(
+            board=board,
+            scope=scope,
+            scope_id=scope_id,
+            position=position,
+            title_id=row[0],
+            average=round(row[2] / row[3], 2),
+            review_count=row[3],
+        )
+        for board in ('top-rated', 'most-reviewed')
+        for (scope, scope_id), scope_rows in scopes.items()
+        for position, row in enumerate(
+            heapq.nsmallest(size, scope_rows, key=rank_key(board)), 1
+        )
+    ]
+    with transaction.atomic():
+        TitleRanking.objects.all().delete()
+        TitleRanking.objects.bulk_create(rankings, batch_size=batch_size)
+    return len(rankings)
@@ -1,8 +1,188 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
 from django.db import models
+from django.db.models.functions import Coalesce, Now
+
+deferred_titles = ContextVar('deferred_titles', default=None)
+
+
+@contextmanager
+def defer_title_counters():
+    """Откладывает пересчёт счётчиков произведений до конца блока.
+
+    При каскадном удалении post_delete отзывов и комментариев не
+    обновляют произведение на каждую строку, а запоминают его id; в конце
+    затронутые произведения пересчитываются двумя запросами."""
+    title_ids = deferred_titles.get()
+    if title_ids is not None:
+        yield title_ids
+        return
+    title_ids = set()
+    token = deferred_titles.set(title_ids)
+    try:
+        yield title_ids
+    finally:
+        deferred_titles.reset(token)
+    if title_ids:
+        from .models import Title, TitleStats
+
+        Title.objects.filter(pk__in=title_ids).rebuild_rating()
+        TitleStats.objects.filter(title_id__in=title_ids).rebuild()
+
+
+def defer_title(title_id):
+    """Запоминает произведение внутри defer_title_counters()."""
+    title_ids = deferred_titles.get()
+    if title_ids is None:
+        return False
+    title_ids.add(title_id)
+    return True
+
+
+def touched():
+    return {'version': models.F('version') + 1, 'updated': Now()}
+
+
+class TitleQuerySet(models.QuerySet):
+    def delete(self):
+        with defer_title_counters():
+            return super().delete()
+
+    def touch(self):
+        """Отмечает изменение произведений для условных GET-запросов."""
+        return self.update(**touched())
+
+    def shift_rating(self, score_delta, count_delta=0):
+        """Инкрементально изменяет сохранённый рейтинг произведений."""
+        rating_sum = models.F('rating_sum') + score_delta
+        rating_count = models.F('rating_count') + count_delta
+        return self.update(
+            rating_sum=rating_sum,
+            rating_count=rating_count,
+            rating=models.Case(
+                models.When(rating_count__lte=-count_delta, then=None),
+                default=models.ExpressionWrapper(
+                    rating_sum / rating_count,
+                    output_field=models.IntegerField()
+                ),
+            ),
+            **touched()
+        )
+
+    def rebuild_rating(self):
+        """Пересчитывает рейтинг произведений по таблице отзывов."""
+        from .models import Review
+
+        reviews = Review.objects.filter(
+            title=models.OuterRef('pk')
+        ).order_by().values('title')
+        rating_sum = reviews.annotate(value=models.Sum('score'))
+        rating_count = reviews.annotate(value=models.Count('id'))
+        rating = reviews.annotate(
+            value=models.Sum('score') / models.Count('id')
+        )
+        return self.update(
+            rating_sum=Coalesce(
+                models.Subquery(rating_sum.values('value')), 0
+            ),
+            rating_count=Coalesce(
+                models.Subquery(rating_count.values('value')), 0
+            ),
+            rating=models.Subquery(rating.values('value')),
+            **touched()
+        )
 
 
-class TitleManager(models.Manager):
+class TitleManager(models.Manager.from_queryset(TitleQuerySet)):
     def get_queryset(self):
-        return super().get_queryset().annotate(
-            rating=models.Avg('reviews__score')
-        ).order_by('id')
+        return super().get_queryset().order_by('id')
+
+
+def score_field(score):
+    return f'score_{score}'
+
+
+def live_stats():
+    """Подзапросы статистики произведения по таблицам отзывов и
+    комментариев."""
+    from .constants import SCORES
+    from .models import Comment, Review
+
+    def count(queryset, value=models.Count('id')):
+        return Coalesce(models.Subquery(
+            queryset.order_by().values('title').annotate(
+                value=value
+            ).values('value')
+        ), 0)
+
+    reviews = Review.objects.filter(title=models.OuterRef('title'))
+    stats = {
+        'review_count': count(reviews),
+        'score_sum': count(reviews, models.Sum('score')),
+        'comment_count': count(
+            Comment.objects.filter(title=models.OuterRef('title'))
+        ),
+    }
+    for score in SCORES:
+        stats[score_field(score)] = count(reviews.filter(score=score))
+    return stats
+
+
+class TitleStatsQuerySet(models.QuerySet):
+    def shift_score(self, score, delta):
+        """Добавляет или исключает оценку отзыва."""
+        return self.update(**{
+            'review_count': models.F('review_count') + delta,
+            'score_sum': models.F('score_sum') + score * delta,
+            score_field(score): models.F(score_field(score)) + delta,
+        })
+
+    def replace_score(self, old_score, new_score):
+        """Переносит изменённую оценку отзыва в гистограмме."""
+        if old_score == new_score:
+            return 0
+        return self.update(**{
+            'score_sum': models.F('score_sum') + new_score - old_score,
+            score_field(old_score): models.F(score_field(old_score)) - 1,
+            score_field(new_score): models.F(score_field(new_score)) + 1,
+        })
+
+    def shift_comments(self, delta):
+        return self.update(comment_count=models.F('comment_count') + delta)
+
+    def rebuild(self):
+        """Пересчитывает статистику по таблицам отзывов и комментариев."""
+        return self.update(**live_stats())
+
+    def mismatched(self):
+        """Строки, расходящиеся с таблицами отзывов и комментариев."""
+        stats = live_stats()
+        condition = models.Q()
+        for name in stats:
+            condition |= ~models.Q(**{name: models.F(f'live_{name}')})
+        return self.annotate(**{
+            f'live_{name}': value for name, value in stats.items()
+        }).filter(condition)
+
+
+class TitleStatsManager(models.Manager.from_queryset(TitleStatsQuerySet)):
+    def materialize(self, title_ids=None, batch_size=500):
+        """Создаёт недостающие строки статистики и пересчитывает их.
+
+        Без title_ids - для всех произведений без статистики."""
+        from .models import Title
+
+        titles = Title.objects.filter(stats__isnull=True)
+        if title_ids is not None:
+            titles = titles.filter(pk__in=title_ids)
+        missing = list(titles.values_list('pk', flat=True))
+        rebuilt = 0
+        for start in range(0, len(missing), batch_size):
+            batch = missing[start:start + batch_size]
+            self.bulk_create(
+                [self.model(title_id=title_id) for title_id in batch],
+                ignore_conflicts=True
+            )
+            rebuilt += self.filter(title_id__in=batch).rebuild()
+        return rebuilt
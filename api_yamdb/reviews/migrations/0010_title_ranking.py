@@ -0,0 +1,36 @@
+# Generated by Django 3.2 on 2026-10-18 17:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_title_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.CharField(choices=[('top-rated', 'Лучшие по рейтингу'), ('most-reviewed', 'Больше всего отзывов')], max_length=20, verbose_name='Рейтинг')),
+                ('scope', models.CharField(choices=[('all', 'Все произведения'), ('category', 'Категория'), ('genre', 'Жанр')], max_length=10, verbose_name='Область')),
+                ('scope_id', models.PositiveIntegerField(default=0, verbose_name='Id категории или жанра')),
+                ('position', models.PositiveSmallIntegerField(verbose_name='Место')),
+                ('average', models.FloatField(verbose_name='Средняя оценка')),
+                ('review_count', models.PositiveIntegerField(verbose_name='Количество отзывов')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='reviews.title')),
+            ],
+            options={
+                'verbose_name': 'Место в рейтинге',
+                'verbose_name_plural': 'Места в рейтингах',
+                'ordering': ['board', 'scope', 'scope_id', 'position'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='titleranking',
+            constraint=models.UniqueConstraint(fields=('board', 'scope', 'scope_id', 'position'), name='title_ranking_position'),
+        ),
+    ]
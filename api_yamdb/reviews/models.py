@@ -1,11 +1,15 @@
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.utils import timezone
 
 from .constants import (
-    ROLE_CHOICES, BASE_LENGTH, BASE_EMAIL_LENGTH, DEFAULT_STR_LENGTH
+    ROLE_CHOICES, BASE_LENGTH, BASE_EMAIL_LENGTH, DEFAULT_STR_LENGTH,
+    LEADERBOARD_CHOICES, LEADERBOARD_SCOPE_CHOICES, SCORES
+)
+from .managers import (
+    TitleManager, TitleStatsManager, defer_title_counters, score_field
 )
-from .managers import TitleManager
 from .validators import validate_year
 
 
@@ -40,9 +44,6 @@ class User(AbstractUser):
         max_length=100,
         verbose_name='Роль'
     )
-    confirmation_code = models.TextField(
-        verbose_name='Код подтверждения'
-    )
 
     class Meta:
         ordering = ['id']
@@ -60,6 +61,16 @@ class User(AbstractUser):
     def __str__(self):
         return self.username
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_username = instance.__dict__.get('username')
+        return instance
+
+    def delete(self, *args, **kwargs):
+        with defer_title_counters():
+            return super().delete(*args, **kwargs)
+
 
 class Category(BaseModel):
 
@@ -93,16 +104,64 @@ class Title(models.Model):
         null=True,
         related_name='titles'
     )
+    rating_sum = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Сумма оценок'
+    )
+    rating_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество оценок'
+    )
+    rating = models.PositiveSmallIntegerField(
+        null=True,
+        editable=False,
+        verbose_name='Рейтинг'
+    )
+    version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Версия'
+    )
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения'
+    )
     objects = TitleManager()
 
+    aggregate_fields = ('rating_sum', 'rating_count', 'rating', 'version')
+
     class Meta:
         ordering = ['id']
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
+        indexes = [
+            models.Index(
+                fields=['category', 'year'],
+                name='title_category_year_idx'
+            )
+        ]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.aggregate_fields
+            ]
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        pk = self.pk
+        with defer_title_counters() as title_ids:
+            result = super().delete(*args, **kwargs)
+            title_ids.discard(pk)
+        return result
+
 
 class Review(models.Model):
     text = models.TextField(verbose_name='Текст отзыва')
@@ -138,10 +197,31 @@ class Review(models.Model):
                 name='once_review'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['title', 'pub_date', 'id'],
+                name='review_title_pub_date_idx'
+            ),
+            models.Index(fields=['title', 'id'], name='review_title_id_idx'),
+            models.Index(
+                fields=['title', 'score'],
+                name='review_title_score_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text[:DEFAULT_STR_LENGTH]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_score = instance.__dict__.get('score')
+        return instance
+
+    def delete(self, *args, **kwargs):
+        with defer_title_counters():
+            return super().delete(*args, **kwargs)
+
 
 class Comment(models.Model):
     text = models.TextField(verbose_name='Текст комментария')
@@ -169,6 +249,190 @@ class Comment(models.Model):
         ordering = ['id']
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                fields=['review', 'pub_date', 'id'],
+                name='comment_review_pub_date_idx'
+            ),
+            models.Index(
+                fields=['review', 'id'],
+                name='comment_review_id_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text[:DEFAULT_STR_LENGTH]
+
+
+class TitleStats(models.Model):
+    """Материализованная статистика отзывов и комментариев произведения.
+
+    Счётчики score_1..score_10 образуют гистограмму оценок."""
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats'
+    )
+    review_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество отзывов'
+    )
+    score_sum = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Сумма оценок'
+    )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество комментариев'
+    )
+    score_1 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Оценок 1'
+    )
+    score_2 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Оценок 2'
+    )
+    score_3 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Оценок 3'
+    )
+    score_4 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Оценок 4'
+    )
+    score_5 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Оценок 5'
+    )
+    score_6 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Оценок 6'
+    )
+    score_7 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Оценок 7'
+    )
+    score_8 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Оценок 8'
+    )
+    score_9 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Оценок 9'
+    )
+    score_10 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Оценок 10'
+    )
+    objects = TitleStatsManager()
+
+    class Meta:
+        ordering = ['title']
+        verbose_name = 'Статистика произведения'
+        verbose_name_plural = 'Статистика произведений'
+
+    def __str__(self):
+        return str(self.title_id)
+
+    @property
+    def average(self):
+        if not self.review_count:
+            return None
+        return round(self.score_sum / self.review_count, 2)
+
+    @property
+    def histogram(self):
+        return {
+            score: getattr(self, score_field(score)) for score in SCORES
+        }
+
+
+class TitleRanking(models.Model):
+    """Строка предрасчитанного рейтинга произведений.
+
+    Таблица целиком пересчитывается командой refresh_leaderboards."""
+    board = models.CharField(
+        max_length=20,
+        choices=LEADERBOARD_CHOICES,
+        verbose_name='Рейтинг'
+    )
+    scope = models.CharField(
+        max_length=10,
+        choices=LEADERBOARD_SCOPE_CHOICES,
+        verbose_name='Область'
+    )
+    scope_id = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Id категории или жанра'
+    )
+    position = models.PositiveSmallIntegerField(verbose_name='Место')
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='rankings'
+    )
+    average = models.FloatField(verbose_name='Средняя оценка')
+    review_count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов'
+    )
+
+    class Meta:
+        ordering = ['board', 'scope', 'scope_id', 'position']
+        verbose_name = 'Место в рейтинге'
+        verbose_name_plural = 'Места в рейтингах'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['board', 'scope', 'scope_id', 'position'],
+                name='title_ranking_position'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.board} {self.scope}:{self.scope_id} #{self.position}'
+
+
+class OutgoingMail(models.Model):
+    subject = models.CharField(max_length=BASE_LENGTH, verbose_name='Тема')
+    message = models.TextField(verbose_name='Текст письма')
+    from_email = models.EmailField(
+        max_length=BASE_EMAIL_LENGTH,
+        verbose_name='Отправитель'
+    )
+    recipient = models.EmailField(
+        max_length=BASE_EMAIL_LENGTH,
+        verbose_name='Получатель'
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата создания'
+    )
+    send_after = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Отправить не раньше'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток отправки'
+    )
+    sent = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Дата отправки'
+    )
+    error = models.TextField(blank=True, verbose_name='Последняя ошибка')
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        indexes = [
+            models.Index(
+                fields=['sent', 'send_after'],
+                name='outgoing_mail_pending_idx'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
@@ -0,0 +1,136 @@
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.db.models.expressions import RawSQL
+
+TITLE_TABLE = 'reviews_title'
+SEARCH_TABLE = 'reviews_title_search'
+
+SQLITE_TABLE = (
+    f'CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5('
+    f"name, content='{TITLE_TABLE}', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')"
+)
+SQLITE_TRIGGERS = {
+    f'{SEARCH_TABLE}_ai': (
+        f'AFTER INSERT ON {TITLE_TABLE} BEGIN '
+        f'INSERT INTO {SEARCH_TABLE}(rowid, name) VALUES (new.id, new.name);'
+        ' END'
+    ),
+    f'{SEARCH_TABLE}_ad': (
+        f'AFTER DELETE ON {TITLE_TABLE} BEGIN '
+        f'INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, name) '
+        "VALUES ('delete', old.id, old.name); END"
+    ),
+    f'{SEARCH_TABLE}_au': (
+        f'AFTER UPDATE OF name ON {TITLE_TABLE} BEGIN '
+        f'INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, name) '
+        "VALUES ('delete', old.id, old.name); "
+        f'INSERT INTO {SEARCH_TABLE}(rowid, name) VALUES (new.id, new.name);'
+        ' END'
+    ),
+}
+POSTGRES_INDEXES = (
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    f'CREATE INDEX IF NOT EXISTS reviews_title_name_trgm_idx '
+    f'ON {TITLE_TABLE} USING gin (UPPER(name::text) gin_trgm_ops)',
+    f'CREATE INDEX IF NOT EXISTS reviews_title_name_tsv_idx '
+    f'ON {TITLE_TABLE} USING gin '
+    f"(to_tsvector('{settings.TITLE_SEARCH_CONFIG}'::regconfig, "
+    "COALESCE(name, '')))",
+)
+
+
+def ensure_search_index(connection):
+    """Создаёт поисковый индекс, если его нет; True - если создан заново.
+
+    Пересоздание таблицы reviews_title в миграциях SQLite удаляет
+    триггеры, поэтому проверка выполняется после каждой миграции."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            for sql in POSTGRES_INDEXES:
+                cursor.execute(sql)
+            return False
+        if connection.vendor != 'sqlite':
+            return False
+        if TITLE_TABLE not in connection.introspection.table_names(cursor):
+            return False
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+            'AND tbl_name = %s', [TITLE_TABLE]
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        if existing.issuperset(SQLITE_TRIGGERS):
+            return False
+        cursor.execute(SQLITE_TABLE)
+        for name, body in SQLITE_TRIGGERS.items():
+            cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {name} {body}')
+    rebuild_search_index(connection)
+    return True
+
+
+def drop_search_index(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            for name in SQLITE_TRIGGERS:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+            cursor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+        elif connection.vendor == 'postgresql':
+            cursor.execute('DROP INDEX IF EXISTS reviews_title_name_trgm_idx')
+            cursor.execute('DROP INDEX IF EXISTS reviews_title_name_tsv_idx')
+
+
+def rebuild_search_index(connection):
+    """Полностью перестраивает индекс FTS5 по таблице произведений."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')"
+        )
+
+
+def search_titles(queryset, query):
+    """Произведения, название которых содержит слова запроса, по рангу.
+
+    SQLite: FTS5 с ранжированием bm25; PostgreSQL: GIN-индекс pg_trgm
+    и TrigramSimilarity либо, с TITLE_SEARCH_POSTGRES = 'fulltext',
+    индекс tsvector и SearchRank."""
+    terms = re.findall(r'\w+', query)
+    if not terms:
+        return queryset.filter(name__icontains=query)
+    vendor = connections[queryset.db].vendor
+    if vendor == 'sqlite':
+        match = ' AND '.join(f'"{term}"*' for term in terms)
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s',
+            [match]
+        )).annotate(search_rank=RawSQL(
+            f'SELECT bm25({SEARCH_TABLE}) FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s '
+            f'AND rowid = {TITLE_TABLE}.id',
+            [match]
+        )).order_by('search_rank', 'id')
+    if vendor == 'postgresql':
+        return search_titles_postgres(queryset, query)
+    return queryset.filter(name__icontains=query)
+
+
+def search_titles_postgres(queryset, query):
+    from django.contrib.postgres.search import (
+        SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+    )
+
+    if settings.TITLE_SEARCH_POSTGRES == 'fulltext':
+        vector = SearchVector('name', config=settings.TITLE_SEARCH_CONFIG)
+        search_query = SearchQuery(
+            query, config=settings.TITLE_SEARCH_CONFIG
+        )
+        return queryset.annotate(
+            search_vector=vector,
+            search_rank=SearchRank(vector, search_query)
+        ).filter(search_vector=search_query).order_by('-search_rank', 'id')
+    return queryset.filter(name__icontains=query).annotate(
+        search_rank=TrigramSimilarity('name', query)
+    ).order_by('-search_rank', 'id')
@@ -0,0 +1,118 @@
+from django.db import connections
+from django.db.models import Q
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_migrate, post_save, pre_delete
+)
+from django.dispatch import receiver
+
+from .managers import defer_title
+from .models import Category, Comment, Genre, Review, Title, TitleStats, User
+from .search import ensure_search_index
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, **kwargs):
+    """Учитывает новую или изменённую оценку в рейтинге и статистике
+    произведения."""
+    titles = Title.objects.filter(pk=instance.title_id)
+    stats = TitleStats.objects.filter(title_id=instance.title_id)
+    if created:
+        titles.shift_rating(instance.score, 1)
+        stats.shift_score(instance.score, 1)
+    else:
+        loaded_score = getattr(instance, '_loaded_score', None)
+        if loaded_score is None:
+            titles.rebuild_rating()
+            stats.rebuild()
+        else:
+            titles.shift_rating(instance.score - loaded_score)
+            stats.replace_score(loaded_score, instance.score)
+    instance._loaded_score = instance.score
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    """Исключает оценку удалённого отзыва из рейтинга и статистики
+    произведения."""
+    if defer_title(instance.title_id):
+        return
+    score = getattr(instance, '_loaded_score', None) or instance.score
+    Title.objects.filter(pk=instance.title_id).shift_rating(-score, -1)
+    TitleStats.objects.filter(
+        title_id=instance.title_id
+    ).shift_score(score, -1)
+
+
+@receiver(post_save, sender=Title)
+def touch_title_on_save(sender, instance, created, **kwargs):
+    if created:
+        TitleStats.objects.create(title=instance)
+    else:
+        Title.objects.filter(pk=instance.pk).touch()
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def touch_title_on_genres(sender, instance, action, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if isinstance(instance, Title):
+        Title.objects.filter(pk=instance.pk).touch()
+    elif pk_set:
+        Title.objects.filter(pk__in=pk_set).touch()
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def touch_titles_on_category(sender, instance, created=False, **kwargs):
+    """Категория входит в ответ произведения; при удалении SET_NULL
+    выполняется запросом update без сигналов произведения."""
+    if not created:
+        Title.objects.filter(category=instance).touch()
+
+
+@receiver(post_save, sender=Genre)
+@receiver(pre_delete, sender=Genre)
+def touch_titles_on_genre(sender, instance, created=False, **kwargs):
+    """Жанры входят в ответ произведения; при удалении жанра связи
+    удаляются без m2m_changed."""
+    if not created:
+        Title.objects.filter(genre=instance).touch()
+
+
+@receiver(post_save, sender=User)
+def touch_titles_on_username(sender, instance, created, **kwargs):
+    """Имя автора входит в ответы отзывов и комментариев."""
+    loaded = getattr(instance, '_loaded_username', None)
+    if not created and loaded != instance.username:
+        Title.objects.filter(
+            Q(reviews__author=instance) | Q(comments__author=instance)
+        ).touch()
+    instance._loaded_username = instance.username
+
+
+@receiver(post_save, sender=Comment)
+def touch_title_on_comment(sender, instance, **kwargs):
+    """Комментарии входят в версию произведения для ETag."""
+    Title.objects.filter(pk=instance.title_id).touch()
+
+
+@receiver(post_save, sender=Comment)
+def count_comment_on_save(sender, instance, created, **kwargs):
+    if created:
+        TitleStats.objects.filter(
+            title_id=instance.title_id
+        ).shift_comments(1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_comment_on_delete(sender, instance, **kwargs):
+    if defer_title(instance.title_id):
+        return
+    TitleStats.objects.filter(title_id=instance.title_id).shift_comments(-1)
+    Title.objects.filter(pk=instance.title_id).touch()
+
+
+@receiver(post_migrate)
+def ensure_title_search_index(sender, using, **kwargs):
+    if sender.label == 'reviews':
+        ensure_search_index(connections[using])
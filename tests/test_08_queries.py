@@ -0,0 +1,196 @@
+from http import HTTPStatus
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import User
+
+from tests.utils import (create_comments, create_single_comment,
+                         create_single_review, create_titles)
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK, (
+        f'Проверьте, что GET-запрос к `{url}` возвращает ответ со '
+        'статусом 200.'
+    )
+    return len(context.captured_queries)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08QueriesAPI:
+
+    def test_01_titles_list_queries_do_not_grow(self, admin_client, client):
+        url = '/api/v1/titles/'
+        titles, categories, genres = create_titles(admin_client)
+        queries_for_page = count_queries(client, url)
+
+        for idx in range(3):
+            response = admin_client.post(url, data={
+                'name': f'Произведение {idx}',
+                'year': 2000 + idx,
+                'genre': [genre['slug'] for genre in genres],
+                'category': categories[idx % 2]['slug'],
+            })
+            assert response.status_code == HTTPStatus.CREATED
+        assert count_queries(client, url) == queries_for_page, (
+            f'Проверьте, что количество SQL-запросов при GET-запросе к '
+            f'`{url}` не зависит от количества произведений на странице.'
+        )
+
+    @pytest.mark.usefixtures('shared_cache')
+    def test_02_authenticated_read_has_no_auth_queries(self, client,
+                                                       user_client):
+        url = '/api/v1/categories/'
+        user_client.get(url)
+        assert count_queries(user_client, url) == count_queries(client, url), (
+            f'Проверьте, что аутентифицированный GET-запрос к `{url}` '
+            'не запрашивает пользователя из базы данных.'
+        )
+
+    def test_03_role_change_applies_to_issued_token(self, admin_client,
+                                                    user, user_client):
+        url = '/api/v1/users/'
+        response = user_client.get(url)
+        assert response.status_code == HTTPStatus.FORBIDDEN
+        response = admin_client.patch(
+            f'{url}{user.username}/', data={'role': 'admin'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        response = user_client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что изменение роли пользователя сразу применяется '
+            'к уже выданному токену.'
+        )
+
+    def test_04_signup_queries(self, client):
+        url = '/api/v1/auth/signup/'
+        data = {'username': 'new_user', 'email': 'new_user@yamdb.fake'}
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(url, data=data)
+        assert response.status_code == HTTPStatus.OK
+        user_queries = [
+            query['sql'] for query in context.captured_queries
+            if 'reviews_user' in query['sql']
+        ]
+        assert len(user_queries) == 2, (
+            f'Проверьте, что POST-запрос к `{url}` проверяет занятость '
+            'username и email одним запросом и создаёт пользователя одной '
+            'вставкой.'
+        )
+
+        response = client.post(url, data=data)
+        assert response.status_code == HTTPStatus.OK
+        response = client.post(
+            url, data={'username': 'other', 'email': data['email']}
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_05_token_queries(self, client, settings):
+        data = {'username': 'new_user', 'email': 'new_user@yamdb.fake'}
+        client.post('/api/v1/auth/signup/', data=data)
+        call_command('send_outbox')
+        code = mail.outbox[-1].body.rsplit(' ', 1)[-1]
+        url = '/api/v1/auth/token/'
+        token_data = {'username': data['username'], 'confirmation_code': code}
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(url, data=token_data)
+        assert response.status_code == HTTPStatus.OK
+        assert len(context.captured_queries) == 1, (
+            f'Проверьте, что POST-запрос к `{url}` проверяет код '
+            'подтверждения без дополнительных запросов к базе данных.'
+        )
+
+        settings.CONFIRMATION_CODE_TIMEOUT = -1
+        response = client.post(url, data=token_data)
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            f'Проверьте, что POST-запрос к `{url}` с просроченным кодом '
+            'подтверждения возвращает ответ со статусом 400.'
+        )
+
+    def test_06_feed_queries_do_not_grow(self, admin_client, admin, client,
+                                         moderator, moderator_client, user,
+                                         user_client):
+        author_map = {admin: admin_client, user: user_client}
+        comments, reviews, titles = create_comments(admin_client, author_map)
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        reviews_url = f'{title_url}reviews/'
+        comments_url = f'{reviews_url}{reviews[0]["id"]}/comments/'
+        queries = {
+            url: count_queries(client, url)
+            for url in (reviews_url, comments_url)
+        }
+
+        create_single_review(moderator_client, titles[0]['id'], 'text', 3)
+        create_single_comment(
+            moderator_client, titles[0]['id'], reviews[0]['id'], 'text'
+        )
+        for url, count in queries.items():
+            assert count_queries(client, url) == count, (
+                f'Проверьте, что количество SQL-запросов при GET-запросе к '
+                f'`{url}` не зависит от количества авторов на странице.'
+            )
+        assert queries[comments_url] <= 3, (
+            f'Проверьте, что GET-запрос к `{comments_url}` получает отзыв '
+            'вместе с произведением одним запросом.'
+        )
+
+    def test_07_comments_scoped_by_title(self, admin_client, admin, client,
+                                         user, user_client):
+        author_map = {admin: admin_client, user: user_client}
+        _, reviews, titles = create_comments(admin_client, author_map)
+        url = (
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/{reviews[0]["id"]}/'
+            'comments/'
+        )
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что комментарии к отзыву недоступны по адресу '
+            'другого произведения.'
+        )
+        response = user_client.post(url, data={'text': 'Комментарий'})
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        response = client.get(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/abc/comments/'
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_08_review_create_has_no_uniqueness_query(self, admin_client,
+                                                       user_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        data = {'text': 'Отзыв', 'score': 5}
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(url, data=data)
+        assert response.status_code == HTTPStatus.CREATED
+        review_reads = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "reviews_review"' in query['sql']
+        ]
+        assert not review_reads, (
+            f'Проверьте, что POST-запрос к `{url}` не проверяет '
+            'уникальность отзыва отдельным запросом.'
+        )
+
+        response = user_client.post(url, data=data)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert 'non_field_errors' in response.json(), (
+            f'Проверьте, что повторный POST-запрос к `{url}` возвращает '
+            'ошибку non_field_errors.'
+        )
+
+    def test_09_user_state_without_shared_cache(self, user, user_client):
+        url = '/api/v1/users/'
+        user_client.get(url)
+        User.objects.filter(pk=user.pk).update(role='admin')
+        response = user_client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что без общего кэша роль пользователя читается из '
+            'базы данных, а не из кэша в памяти процесса.'
+        )
@@ -0,0 +1,59 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_comments
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09FeedPaginationAPI:
+
+    def collect(self, client, url):
+        results = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что GET-запрос к `{url}` с параметром `cursor` '
+                'возвращает ответ со статусом 200.'
+            )
+            data = response.json()
+            assert set(data) == {'next', 'results'}, (
+                'Проверьте, что курсорная пагинация возвращает ключи '
+                '`next` и `results`.'
+            )
+            results.extend(data['results'])
+            url = data['next']
+        return results
+
+    def test_01_reviews_and_comments_cursor(self, admin_client, admin, user,
+                                            user_client, moderator,
+                                            moderator_client):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        comments, reviews, titles = create_comments(admin_client, author_map)
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        comments_url = f'{reviews_url}{reviews[0]["id"]}/comments/'
+
+        for url, expected in ((reviews_url, reviews),
+                              (comments_url, comments)):
+            results = self.collect(admin_client, f'{url}?cursor=&page_size=2')
+            assert [obj['id'] for obj in results] == [
+                obj['id'] for obj in expected
+            ], (
+                f'Проверьте, что курсорная пагинация `{url}` возвращает все '
+                'объекты по одному разу в порядке публикации.'
+            )
+
+        response = admin_client.get(f'{reviews_url}?cursor=broken')
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что некорректный курсор возвращает ответ со '
+            'статусом 404.'
+        )
+        response = admin_client.get(reviews_url)
+        assert 'count' in response.json(), (
+            'Проверьте, что без параметра `cursor` используется '
+            'постраничная пагинация.'
+        )
@@ -0,0 +1,170 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Category
+
+from tests.utils import (create_comments, create_single_comment,
+                         create_single_review, create_titles)
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures('shared_cache')
+class Test10ResponseCacheAPI:
+
+    def test_01_titles_cache_invalidation(self, admin_client, client,
+                                          user_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS'
+        response = client.get(url)
+        assert response['X-Cache'] == 'HIT', (
+            f'Проверьте, что повторный GET-запрос к `{url}` отдаётся из кэша.'
+        )
+
+        create_single_review(user_client, titles[0]['id'], 'text', 7)
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['rating'] == 7, (
+            'Проверьте, что новый отзыв сбрасывает кэш произведения.'
+        )
+
+        client.get('/api/v1/titles/')
+        response = admin_client.patch(url, data={'name': 'Новое название'})
+        assert response.status_code == HTTPStatus.OK
+        response = client.get('/api/v1/titles/')
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что изменение произведения сбрасывает кэш списка.'
+        )
+        assert 'Новое название' in [
+            title['name'] for title in response.json()['results']
+        ]
+
+    def test_02_conditional_get(self, admin_client, admin, client, user,
+                                user_client):
+        author_map = {admin: admin_client, user: user_client}
+        _, reviews, titles = create_comments(admin_client, author_map)
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        reviews_url = f'{title_url}reviews/'
+        comments_url = f'{reviews_url}{reviews[0]["id"]}/comments/'
+
+        for url in (title_url, reviews_url, comments_url):
+            response = client.get(url)
+            etag = response.get('ETag')
+            assert etag and etag.startswith('W/'), (
+                f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+                'слабый ETag.'
+            )
+            assert response.get('Last-Modified'), (
+                f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+                'заголовок Last-Modified.'
+            )
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+                f'Проверьте, что GET-запрос к `{url}` с актуальным '
+                'If-None-Match возвращает ответ со статусом 304.'
+            )
+
+            create_single_comment(
+                user_client, titles[0]['id'], reviews[0]['id'], url
+            )
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что после изменения данных GET-запрос к `{url}` '
+                'с устаревшим If-None-Match возвращает ответ со статусом 200.'
+            )
+
+    def test_03_category_and_genre_changes_invalidate_titles(
+        self, admin_client, client
+    ):
+        titles, categories, genres = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        client.get('/api/v1/titles/')
+        client.get(url)
+
+        category = titles[0]['category']
+        admin_client.delete(f'/api/v1/categories/{category}/')
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['category'] is None, (
+            'Проверьте, что удаление категории сбрасывает кэш произведения.'
+        )
+        response = client.get('/api/v1/titles/')
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что удаление категории сбрасывает кэш списка '
+            'произведений.'
+        )
+
+        genre = titles[0]['genre'][0]
+        admin_client.delete(f'/api/v1/genres/{genre}/')
+        response = client.get(url)
+        assert genre not in [
+            item['slug'] for item in response.json()['genre']
+        ], 'Проверьте, что удаление жанра сбрасывает кэш произведения.'
+
+    def test_04_related_changes_update_etag(self, admin_client, admin,
+                                            client, user, user_client):
+        author_map = {admin: admin_client, user: user_client}
+        _, reviews, titles = create_comments(admin_client, author_map)
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        reviews_url = f'{title_url}reviews/'
+        category = Category.objects.get(slug=titles[0]['category'])
+
+        def rename_category():
+            category.name = 'Новое название'
+            category.save()
+
+        changes = (
+            (title_url, rename_category),
+            (title_url, lambda: admin_client.delete(
+                f'/api/v1/categories/{titles[0]["category"]}/'
+            )),
+            (title_url, lambda: admin_client.delete(
+                f'/api/v1/genres/{titles[0]["genre"][0]}/'
+            )),
+            (reviews_url, lambda: admin_client.patch(
+                f'/api/v1/users/{user.username}/', data={'username': 'renamed'}
+            )),
+        )
+        for url, change in changes:
+            etag = client.get(url)['ETag']
+            change()
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что изменение связанных данных меняет ETag '
+                f'ответа `{url}`.'
+            )
+        assert 'renamed' in [
+            review['author'] for review in response.json()['results']
+        ]
+
+    def test_05_cache_keys(self, admin_client, client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        client.get(f'/api/v1/titles/0{title_id}/')
+        create_single_review(user_client, title_id, 'text', 7)
+        response = client.get(f'/api/v1/titles/0{title_id}/')
+        assert response.json()['rating'] == 7, (
+            'Проверьте, что кэш произведения сбрасывается и для URL с '
+            'ведущими нулями в id.'
+        )
+
+        url = '/api/v1/titles/'
+        client.get(url, HTTP_HOST='internal.local')
+        response = client.get(url, HTTP_HOST='public.example.com')
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что ответы с абсолютными ссылками кэшируются '
+            'отдельно для каждого хоста.'
+        )
+
+    def test_06_no_cache_without_shared_backend(self, client, settings):
+        settings.CACHES = {'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }}
+        for _ in range(2):
+            response = client.get('/api/v1/categories/')
+        assert 'X-Cache' not in response, (
+            'Проверьте, что с LocMemCache кэш ответов выключен.'
+        )
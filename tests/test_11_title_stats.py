@@ -0,0 +1,109 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Review, Title, TitleStats
+from tests.utils import create_comments, create_single_comment
+
+
+def get_stats(client, title_id):
+    url = f'/api/v1/titles/{title_id}/stats/'
+    response = client.get(url)
+    assert response.status_code == HTTPStatus.OK, (
+        f'Проверьте, что GET-запрос к `{url}` возвращает ответ со '
+        'статусом 200.'
+    )
+    return response.json()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11TitleStatsAPI:
+
+    def test_01_stats_follow_reviews_and_comments(self, admin_client, admin,
+                                                  client, user, user_client):
+        author_map = {admin: admin_client, user: user_client}
+        comments, reviews, titles = create_comments(admin_client, author_map)
+        title_id = titles[0]['id']
+
+        stats = get_stats(client, title_id)
+        assert stats['review_count'] == 2
+        assert stats['average'] == 5
+        assert stats['histogram']['5'] == 2
+        assert stats['comment_count'] == len(comments)
+
+        reviews_url = f'/api/v1/titles/{title_id}/reviews/'
+        response = user_client.patch(
+            f'{reviews_url}{reviews[1]["id"]}/', data={'score': 8}
+        )
+        assert response.status_code == HTTPStatus.OK
+        stats = get_stats(client, title_id)
+        assert stats['average'] == 6.5
+        assert stats['histogram']['5'] == 1
+        assert stats['histogram']['8'] == 1, (
+            'Проверьте, что изменение оценки переносится в гистограмме.'
+        )
+
+        response = admin_client.delete(f'{reviews_url}{reviews[0]["id"]}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        stats = get_stats(client, title_id)
+        assert stats['review_count'] == 1
+        assert stats['comment_count'] == 0, (
+            'Проверьте, что комментарии удалённого отзыва исключаются '
+            'из статистики.'
+        )
+        call_command('check_title_stats')
+
+        response = client.get('/api/v1/titles/0/stats/')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_02_check_and_materialize(self, admin_client, admin, client,
+                                      user, user_client):
+        author_map = {admin: admin_client, user: user_client}
+        _, _, titles = create_comments(admin_client, author_map)
+        title_id = titles[0]['id']
+
+        TitleStats.objects.filter(title_id=title_id).update(review_count=0)
+        with pytest.raises(CommandError):
+            call_command('check_title_stats')
+        call_command('check_title_stats', '--fix')
+        call_command('check_title_stats')
+
+        TitleStats.objects.filter(title_id=title_id).delete()
+        with pytest.raises(CommandError):
+            call_command('check_title_stats')
+        call_command('check_title_stats', '--fix')
+        assert get_stats(client, title_id)['review_count'] == 2, (
+            'Проверьте, что `check_title_stats --fix` создаёт недостающие '
+            'строки статистики.'
+        )
+        assert not Title.objects.filter(stats__isnull=True).exists()
+
+    def test_03_cascade_delete_queries(self, admin_client, admin, user,
+                                       user_client):
+        author_map = {admin: admin_client, user: user_client}
+        comments, reviews, titles = create_comments(admin_client, author_map)
+        for idx in range(5):
+            create_single_comment(
+                user_client, titles[0]['id'], reviews[0]['id'], f'text {idx}'
+            )
+        title = Title.objects.get(pk=titles[0]['id'])
+        with CaptureQueriesContext(connection) as context:
+            title.delete()
+        assert len(context.captured_queries) <= 12, (
+            'Проверьте, что каскадное удаление произведения не обновляет '
+            'счётчики на каждый удаляемый отзыв и комментарий.'
+        )
+        call_command('check_title_stats')
+
+        with CaptureQueriesContext(connection) as context:
+            user.delete()
+        assert len(context.captured_queries) <= 10, (
+            'Проверьте, что каскадное удаление пользователя пересчитывает '
+            'счётчики произведений пакетно.'
+        )
+        call_command('check_title_stats')
+        assert not Review.objects.filter(author=user).exists()
@@ -0,0 +1,155 @@
+from http import HTTPStatus
+
+import sqlite3
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Title, TitleStats
+from tests.utils import create_categories, create_genre
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12TitlesBulkAPI:
+    url = '/api/v1/titles/bulk/'
+
+    def test_01_bulk_create(self, admin_client, client, user_client):
+        categories = create_categories(admin_client)
+        genres = create_genre(admin_client)
+        data = [
+            {
+                'name': f'Произведение {idx}',
+                'year': 2000 + idx,
+                'genre': [genre['slug'] for genre in genres],
+                'category': categories[idx % 2]['slug'],
+            }
+            for idx in range(20)
+        ]
+        response = user_client.post(self.url, data=data, format='json')
+        assert response.status_code == HTTPStatus.FORBIDDEN
+
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(self.url, data=data, format='json')
+        assert response.status_code == HTTPStatus.CREATED, (
+            f'Проверьте, что POST-запрос администратора к `{self.url}` со '
+            'списком произведений возвращает ответ со статусом 201.'
+        )
+        assert len(context.captured_queries) < 15, (
+            f'Проверьте, что POST-запрос к `{self.url}` выполняет '
+            'постоянное число SQL-запросов.'
+        )
+        created = response.json()
+        assert [title['name'] for title in created] == [
+            title['name'] for title in data
+        ]
+        assert all(len(title['genre']) == len(genres) for title in created)
+        assert TitleStats.objects.filter(
+            title_id__in=[title['id'] for title in created]
+        ).count() == len(data), (
+            'Проверьте, что пакетное создание создаёт строки статистики '
+            'произведений.'
+        )
+
+        response = client.get('/api/v1/titles/')
+        assert response.json()['count'] == len(data), (
+            'Проверьте, что пакетное создание сбрасывает кэш списка.'
+        )
+
+    def test_02_bulk_validation_and_update(self, admin_client):
+        categories = create_categories(admin_client)
+        genres = create_genre(admin_client)
+        data = [
+            {
+                'name': 'Произведение',
+                'year': 2000,
+                'genre': [genres[0]['slug']],
+                'category': categories[0]['slug'],
+            },
+            {
+                'name': 'Произведение',
+                'year': 2000,
+                'genre': ['unknown'],
+                'category': categories[0]['slug'],
+            },
+        ]
+        response = admin_client.post(self.url, data=data, format='json')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        errors = response.json()
+        assert errors[0] == {} and 'genre' in errors[1], (
+            f'Проверьте, что POST-запрос к `{self.url}` возвращает ошибки '
+            'по каждому элементу списка.'
+        )
+        assert not Title.objects.exists(), (
+            'Проверьте, что при ошибке в любом элементе ничего не '
+            'сохраняется.'
+        )
+
+        response = admin_client.post(self.url, data=data[:1], format='json')
+        title_id = response.json()[0]['id']
+        response = admin_client.patch(self.url, data=[{
+            'id': title_id,
+            'name': 'Новое название',
+            'genre': [genre['slug'] for genre in genres],
+        }], format='json')
+        assert response.status_code == HTTPStatus.OK
+        title = response.json()[0]
+        assert title['name'] == 'Новое название'
+        assert len(title['genre']) == len(genres)
+        assert title['category']['slug'] == categories[0]['slug']
+
+        response = admin_client.patch(
+            self.url, data=[{'name': 'Без id'}], format='json'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert 'id' in response.json()[0]
+
+    def test_03_bulk_create_does_not_reuse_ids(self, admin_client):
+        categories = create_categories(admin_client)
+        genres = create_genre(admin_client)
+        data = [
+            {'name': f'Произведение {idx}', 'year': 2000,
+             'genre': [genres[0]['slug']], 'category': categories[0]['slug']}
+            for idx in range(2)
+        ]
+        response = admin_client.post(self.url, data=data, format='json')
+        assert response.status_code == HTTPStatus.CREATED
+        deleted_id = max(title['id'] for title in response.json())
+        admin_client.delete(f'/api/v1/titles/{deleted_id}/')
+
+        response = admin_client.post(self.url, data=data, format='json')
+        assert response.status_code == HTTPStatus.CREATED
+        assert min(title['id'] for title in response.json()) > deleted_id, (
+            'Проверьте, что пакетное создание не назначает id удалённых '
+            'произведений.'
+        )
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': 'Произведение', 'year': 2000,
+            'category': categories[0]['slug'], 'genre': [genres[0]['slug']],
+        })
+        assert response.json()['id'] == Title.objects.latest('pk').pk
+
+    def test_04_bulk_create_conflict(self, admin_client):
+        if connection.vendor != 'sqlite':
+            pytest.skip('Проверка блокировки SQLite.')
+        categories = create_categories(admin_client)
+        genres = create_genre(admin_client)
+        data = [{'name': 'Произведение', 'year': 2000,
+                 'genre': [genres[0]['slug']],
+                 'category': categories[0]['slug']}]
+        writer = sqlite3.connect(
+            connection.settings_dict['NAME'], uri=True, timeout=0,
+            isolation_level=None
+        )
+        writer.execute('BEGIN IMMEDIATE')
+        try:
+            response = admin_client.post(self.url, data=data, format='json')
+        finally:
+            writer.execute('ROLLBACK')
+            writer.close()
+        assert response.status_code == HTTPStatus.CONFLICT, (
+            'Проверьте, что пакетное создание во время записи другого '
+            'соединения возвращает ответ со статусом 409.'
+        )
+        response = admin_client.post(self.url, data=data, format='json')
+        assert response.status_code == HTTPStatus.CREATED
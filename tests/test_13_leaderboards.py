@@ -0,0 +1,63 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13LeaderboardsAPI:
+    url = '/api/v1/leaderboards/'
+
+    def test_01_leaderboards(self, admin_client, client, moderator_client,
+                             user_client, settings):
+        settings.LEADERBOARD_MIN_REVIEWS = 2
+        titles, _, _ = create_titles(admin_client)
+        scores = {
+            titles[0]['id']: (4, 6, 8),
+            titles[1]['id']: (9, 10),
+        }
+        for title_id, title_scores in scores.items():
+            for author_client, score in zip(
+                (admin_client, moderator_client, user_client), title_scores
+            ):
+                create_single_review(author_client, title_id, 'text', score)
+
+        call_command('refresh_leaderboards')
+
+        url = f'{self.url}top-rated/'
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert len(context.captured_queries) == 1, (
+            f'Проверьте, что GET-запрос к `{url}` читает готовый рейтинг '
+            'одним запросом.'
+        )
+        assert [row['id'] for row in response.json()] == [
+            titles[1]['id'], titles[0]['id']
+        ]
+        assert response.json()[0]['average'] == 9.5
+
+        response = client.get(f'{self.url}most-reviewed/?limit=1')
+        assert [row['id'] for row in response.json()] == [titles[0]['id']]
+
+        response = client.get(f'{url}?category={titles[0]["category"]}')
+        assert response.status_code == HTTPStatus.OK
+        assert [row['id'] for row in response.json()] == [titles[0]['id']]
+        response = client.get(f'{url}?genre={titles[1]["genre"][0]}')
+        assert [row['id'] for row in response.json()] == [titles[1]['id']]
+
+        call_command('refresh_leaderboards', '--min-reviews', '3')
+        response = client.get(url)
+        assert [row['id'] for row in response.json()] == [
+            titles[0]['id']
+        ], (
+            'Проверьте, что в рейтинг попадают только произведения с '
+            'минимальным количеством отзывов.'
+        )
+
+        response = client.get(f'{url}?category=unknown')
+        assert response.status_code == HTTPStatus.NOT_FOUND
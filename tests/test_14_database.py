@@ -0,0 +1,173 @@
+import re
+
+import pytest
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, router
+from django.db.models import Count, Sum
+from django.http import HttpResponse
+from django.test import RequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.benchmarks import explain_query_plan, record_queries
+from api.middleware import ReplicaRoutingMiddleware
+from reviews.models import Review, Title
+from tests.utils import create_comments, create_titles
+
+INDEX_PATTERN = (
+    r'^SEARCH {} USING (?:COVERING INDEX|INDEX|INTEGER PRIMARY KEY)'
+)
+
+
+def assert_indexed(plan, table, description):
+    assert any(
+        re.match(INDEX_PATTERN.format(table), line) for line in plan
+    ), (
+        f'Проверьте, что {description} читает таблицу {table} по индексу. '
+        f'План: {plan}'
+    )
+    assert not any('TEMP B-TREE' in line for line in plan), (
+        f'Проверьте, что {description} не сортирует строки во временном '
+        f'B-дереве. План: {plan}'
+    )
+
+
+def main_query_plan(client, url, table):
+    with record_queries() as recorder:
+        response = client.get(url)
+    assert response.status_code == 200
+    for query in recorder.queries:
+        if query['sql'].startswith(f'SELECT "{table}"."id", '):
+            return explain_query_plan(query['sql'], query['params'])
+    raise AssertionError(f'GET-запрос к `{url}` не читает таблицу {table}.')
+
+
+def queryset_plan(queryset):
+    sql, params = queryset.query.sql_with_params()
+    return explain_query_plan(sql, params)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14Database:
+
+    def test_01_sqlite_pragmas(self):
+        if connection.vendor != 'sqlite':
+            pytest.skip('Проверка настроек SQLite.')
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            synchronous = cursor.fetchone()[0]
+            cursor.execute('PRAGMA busy_timeout')
+            busy_timeout = cursor.fetchone()[0]
+        assert synchronous == 1, (
+            'Проверьте, что соединение с SQLite использует '
+            'synchronous=NORMAL.'
+        )
+        assert busy_timeout == settings.SQLITE_PRAGMAS['busy_timeout'], (
+            'Проверьте, что соединение с SQLite использует busy_timeout.'
+        )
+
+    def test_02_replica_routing(self, settings, request, user, admin):
+        settings.DATABASE_REPLICAS = ['replica']
+        with pytest.raises(ImproperlyConfigured):
+            ReplicaRoutingMiddleware(HttpResponse)
+        request.getfixturevalue('shared_cache')
+        routed = []
+
+        def view(request):
+            routed.append(router.db_for_read(Title))
+            if request.method == 'POST':
+                router.db_for_write(Title)
+                routed.append(router.db_for_read(Title))
+            return HttpResponse(status=201)
+
+        middleware = ReplicaRoutingMiddleware(view)
+        factory = RequestFactory()
+        user_auth = f'Bearer {AccessToken.for_user(user)}'
+        admin_auth = f'Bearer {AccessToken.for_user(admin)}'
+
+        middleware(factory.get('/', HTTP_AUTHORIZATION=user_auth))
+        assert routed.pop() == 'replica', (
+            'Проверьте, что GET-запрос читает модели reviews с реплики.'
+        )
+        middleware(factory.post('/', HTTP_AUTHORIZATION=user_auth))
+        assert routed == ['default', 'default'], (
+            'Проверьте, что небезопасный запрос читает и пишет в основную '
+            'базу.'
+        )
+        routed.clear()
+
+        middleware(factory.get('/', HTTP_AUTHORIZATION=user_auth))
+        middleware(factory.get('/', HTTP_AUTHORIZATION=admin_auth))
+        assert routed == ['default', 'replica'], (
+            'Проверьте, что после записи пользователь читает из основной '
+            'базы, а остальные - с реплики.'
+        )
+        assert router.db_for_read(Title) == 'default', (
+            'Проверьте, что вне запроса чтение идёт из основной базы.'
+        )
+
+    def test_03_access_pattern_indexes(self, admin_client, admin, client,
+                                       user, user_client):
+        if connection.vendor != 'sqlite':
+            pytest.skip('Проверка планов запросов SQLite.')
+        author_map = {admin: admin_client, user: user_client}
+        _, reviews, titles = create_comments(admin_client, author_map)
+        title_id = titles[0]['id']
+        review_id = reviews[0]['id']
+        title_url = f'/api/v1/titles/{title_id}/'
+        endpoints = (
+            (
+                f'/api/v1/titles/?category={titles[0]["category"]}'
+                f'&year={titles[0]["year"]}',
+                'reviews_title'
+            ),
+            (title_url, 'reviews_title'),
+            (f'{title_url}reviews/', 'reviews_review'),
+            (f'{title_url}reviews/{review_id}/', 'reviews_review'),
+            (f'{title_url}reviews/{review_id}/comments/', 'reviews_comment'),
+        )
+        for url, table in endpoints:
+            assert_indexed(
+                main_query_plan(client, url, table), table,
+                f'GET-запрос к `{url}`'
+            )
+
+        plan = queryset_plan(
+            Review.objects.filter(author=user, title_id=title_id)
+        )
+        assert_indexed(plan, 'reviews_review', 'проверка уникальности отзыва')
+        plan = queryset_plan(
+            Review.objects.filter(
+                title_id=title_id
+            ).order_by().values('title').annotate(
+                total=Sum('score'), count=Count('id')
+            )
+        )
+        assert any('COVERING INDEX review_title_score_idx' in line
+                   for line in plan), (
+            'Проверьте, что агрегация оценок произведения читает только '
+            f'покрывающий индекс (title_id, score). План: {plan}'
+        )
+
+    def test_04_title_name_search(self, admin_client, client):
+        titles, categories, genres = create_titles(admin_client)
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': '...', 'year': 2000,
+            'genre': [genres[0]['slug']], 'category': categories[0]['slug'],
+        })
+        assert response.status_code == 201
+        url = '/api/v1/titles/'
+        response = client.get(url, {'name': 'крепк'})
+        assert [title['id'] for title in response.json()['results']] == [
+            titles[1]['id']
+        ], (
+            f'Проверьте, что фильтр `name` эндпоинта `{url}` находит '
+            'произведение по началу слова из названия.'
+        )
+        response = client.get(url, {'name': '...'})
+        assert [title['name'] for title in response.json()['results']] == [
+            '...'
+        ], (
+            f'Проверьте, что фильтр `name` эндпоинта `{url}` без букв и цифр '
+            'ищет подстроку в названии.'
+        )
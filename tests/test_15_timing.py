@@ -0,0 +1,91 @@
+import json
+import logging
+from http import HTTPStatus
+
+import pytest
+from rest_framework.serializers import BaseSerializer, ListSerializer
+from rest_framework.views import APIView
+
+from api import serializers, views
+from api.timing import TimedSerializerMixin, TimedViewMixin, histograms
+from tests.utils import create_titles
+
+
+@pytest.fixture
+def timing(settings):
+    settings.API_TIMING = True
+    settings.MIDDLEWARE = ['api.timing.TimingMiddleware', *settings.MIDDLEWARE]
+    histograms.reset()
+    yield
+    histograms.reset()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15TimingAPI:
+
+    def test_01_server_timing_header(self, admin_client, client, timing,
+                                     caplog):
+        create_titles(admin_client)
+        url = '/api/v1/titles/'
+        logger = logging.getLogger('api.timing')
+        logger.addHandler(caplog.handler)
+        try:
+            response = client.get(url)
+        finally:
+            logger.removeHandler(caplog.handler)
+        assert response.status_code == HTTPStatus.OK
+        header = response.get('Server-Timing', '')
+        for name in ('db', 'serializer', 'permissions', 'view', 'total'):
+            assert f'{name};dur=' in header, (
+                f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+                f'раздел {name} в заголовке Server-Timing.'
+            )
+        assert 'queries"' in header
+
+        record = json.loads(caplog.records[-1].getMessage())
+        assert record['route'] == 'title-list'
+        assert record['status'] == HTTPStatus.OK
+        assert record['db_queries'] > 0
+        assert record['serializer_ms'] > 0, (
+            'Проверьте, что время сериализации попадает в лог api.timing.'
+        )
+
+    def test_02_metrics_endpoint(self, admin_client, client, user_client,
+                                 timing):
+        for _ in range(3):
+            client.get('/api/v1/categories/')
+        url = '/api/v1/_metrics/'
+        assert client.get(url).status_code == HTTPStatus.UNAUTHORIZED
+        assert user_client.get(url).status_code == HTTPStatus.FORBIDDEN, (
+            f'Проверьте, что `{url}` доступен только администратору.'
+        )
+        response = admin_client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        routes = response.json()['routes']
+        assert routes['category-list']['count'] == 3, (
+            f'Проверьте, что `{url}` возвращает гистограммы по маршрутам.'
+        )
+        assert sum(routes['category-list']['buckets'].values()) == 3
+
+    def test_03_disabled_by_default(self, client):
+        response = client.get('/api/v1/categories/')
+        assert 'Server-Timing' not in response, (
+            'Проверьте, что TimingMiddleware включается только явно.'
+        )
+
+    @pytest.mark.parametrize('module, base, mixin', (
+        (views, APIView, TimedViewMixin),
+        (serializers, BaseSerializer, TimedSerializerMixin),
+    ))
+    def test_04_timed_base_classes(self, module, base, mixin):
+        classes = [
+            cls for cls in vars(module).values()
+            if isinstance(cls, type) and cls.__module__ == module.__name__
+            and issubclass(cls, base) and not issubclass(cls, ListSerializer)
+        ]
+        assert classes
+        for cls in classes:
+            assert issubclass(cls, mixin), (
+                f'Проверьте, что {cls.__name__} наследуется от базового '
+                f'класса из {module.__name__}.'
+            )
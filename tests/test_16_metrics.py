@@ -0,0 +1,148 @@
+import os
+import re
+import shutil
+from http import HTTPStatus
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+
+from api.metrics import registry
+
+URL = '/metrics'
+TOKEN = 'secret'
+AUTH = {'HTTP_AUTHORIZATION': f'Bearer {TOKEN}'}
+
+
+@pytest.fixture(autouse=True)
+def clear_metrics(settings):
+    settings.METRICS_TOKEN = TOKEN
+    registry.reset()
+    yield
+    registry.reset()
+
+
+def sample(text, name, **labels):
+    pattern = re.escape(name) + r'\{([^}]*)\} (\S+)'
+    for found_labels, value in re.findall(pattern, text):
+        pairs = dict(re.findall(r'(\w+)="([^"]*)"', found_labels))
+        if all(pairs.get(key) == str(val) for key, val in labels.items()):
+            return float(value)
+    return None
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16MetricsAPI:
+
+    def test_01_exposition(self, client, shared_cache):
+        for _ in range(2):
+            client.get('/api/v1/categories/')
+        client.get('/api/v1/titles/100500/')
+        response = client.get(URL, **AUTH)
+        assert response.status_code == HTTPStatus.OK
+        assert response['Content-Type'].startswith('text/plain'), (
+            f'Проверьте, что `{URL}` отдаёт метрики в текстовом формате.'
+        )
+        text = response.content.decode()
+        assert '# TYPE yamdb_http_request_duration_seconds histogram' in text
+        assert sample(
+            text, 'yamdb_http_requests_total',
+            route='category-list', method='GET', status=200
+        ) == 2, (
+            f'Проверьте, что `{URL}` считает ответы по маршрутам и статусам.'
+        )
+        assert sample(
+            text, 'yamdb_http_requests_total', route='title-detail', status=404
+        ) == 1
+        assert sample(
+            text, 'yamdb_http_request_duration_seconds_bucket',
+            route='category-list', le='+Inf'
+        ) == 2
+        assert sample(
+            text, 'yamdb_db_queries_per_request_count', route='category-list'
+        ) == 2
+        for result in ('hit', 'miss'):
+            assert sample(
+                text, 'yamdb_cache_requests_total',
+                route='category-list', result=result
+            ) == 1, (
+                f'Проверьте, что `{URL}` считает попадания в кэш ответов.'
+            )
+
+    def test_02_signup_and_token(self, client):
+        data = {'username': 'new_user', 'email': 'new_user@yamdb.fake'}
+        client.post('/api/v1/auth/signup/', data=data)
+        client.post('/api/v1/auth/signup/', data=data)
+        call_command('send_outbox')
+        code = mail.outbox[-1].body.rsplit(' ', 1)[-1]
+        url = '/api/v1/auth/token/'
+        client.post(url, data={'username': 'new_user', 'confirmation_code': 1})
+        client.post(
+            url, data={'username': 'new_user', 'confirmation_code': code}
+        )
+        text = client.get(URL, **AUTH).content.decode()
+        assert sample(text, 'yamdb_signups_total', result='created') == 1
+        assert sample(text, 'yamdb_signups_total', result='existing') == 1
+        assert sample(text, 'yamdb_tokens_total', result='issued') == 1, (
+            f'Проверьте, что `{URL}` считает выданные токены.'
+        )
+        assert sample(text, 'yamdb_tokens_total', result='rejected') == 1
+
+    def test_03_bounded_labels(self, client, settings):
+        settings.METRICS_MAX_SERIES = 2
+        for url in ('/api/v1/categories/', '/api/v1/genres/',
+                    '/api/v1/titles/', '/unknown/'):
+            client.get(url)
+        text = client.get(URL, **AUTH).content.decode()
+        routes = set(re.findall(
+            r'^yamdb_http_requests_total\{route="([^"]*)"', text, re.M
+        ))
+        assert routes == {'category-list', 'genre-list', 'other'}, (
+            'Проверьте, что число рядов метрики ограничено METRICS_MAX_SERIES.'
+        )
+
+    def test_04_multiprocess(self, client, settings, tmp_path):
+        settings.METRICS_DIR = str(tmp_path)
+        client.get('/api/v1/categories/')
+        registry.flush()
+        shutil.copy(registry.path(), tmp_path / 'metrics_1.json')
+        text = client.get(URL, **AUTH).content.decode()
+        assert sample(
+            text, 'yamdb_http_requests_total', route='category-list'
+        ) == 2, (
+            f'Проверьте, что `{URL}` суммирует метрики всех процессов '
+            'из METRICS_DIR.'
+        )
+
+    def test_05_token_protected(self, client, settings):
+        assert client.get(URL).status_code == HTTPStatus.FORBIDDEN
+        response = client.get(URL, HTTP_AUTHORIZATION='Bearer wrong')
+        assert response.status_code == HTTPStatus.FORBIDDEN
+        assert client.get(URL, **AUTH).status_code == HTTPStatus.OK
+        settings.METRICS_TOKEN = ''
+        assert client.get(URL, **AUTH).status_code == HTTPStatus.FORBIDDEN, (
+            f'Проверьте, что без METRICS_TOKEN доступ к `{URL}` закрыт.'
+        )
+
+    def test_06_dead_processes(self, client, settings, tmp_path):
+        settings.METRICS_DIR = str(tmp_path)
+        (tmp_path / 'metrics_1.json').write_text('{}')
+        registry.clear()
+        assert not list(tmp_path.iterdir()), (
+            'Проверьте, что registry.clear() удаляет файлы прошлого запуска.'
+        )
+        client.get('/api/v1/categories/')
+        registry.flush()
+        for pid in (1, 2):
+            shutil.copy(registry.path(), tmp_path / f'metrics_{pid}.json')
+            registry.mark_process_dead(pid)
+        assert {path.name for path in tmp_path.iterdir()} == {
+            'metrics_dead.json', os.path.basename(registry.path())
+        }
+        text = client.get(URL, **AUTH).content.decode()
+        assert sample(
+            text, 'yamdb_http_requests_total', route='category-list'
+        ) == 3, (
+            'Проверьте, что значения завершившихся процессов сохраняются '
+            'в общем файле.'
+        )
@@ -0,0 +1,110 @@
+import json
+import logging
+
+import pytest
+from django.core.management import call_command
+
+from api.slow_queries import fingerprint, stats
+from tests.utils import create_titles
+
+
+@pytest.fixture
+def slow_log(caplog, settings):
+    settings.SLOW_QUERY_MS = 0.000001
+    settings.MIDDLEWARE = [
+        'api.slow_queries.SlowQueryMiddleware', *settings.MIDDLEWARE
+    ]
+    stats.reset()
+    logger = logging.getLogger('api.slow_queries')
+    handlers = logger.handlers
+    logger.handlers = [caplog.handler]
+    yield caplog
+    logger.handlers = handlers
+    stats.reset()
+
+
+def test_fingerprint_normalizes_literals():
+    first, query = fingerprint(
+        'SELECT "id" FROM "t" WHERE "id" IN (%s, %s, %s) AND "name" = \'a\' '
+        'LIMIT 10'
+    )
+    second, _ = fingerprint(
+        'SELECT "id"  FROM "t" WHERE "id" IN (%s) AND "name" = \'b\' LIMIT 20'
+    )
+    assert first == second, (
+        'Проверьте, что отпечаток запроса не зависит от литералов и длины '
+        'списка IN.'
+    )
+    assert query == (
+        'SELECT "id" FROM "t" WHERE "id" IN (...) AND "name" = ? LIMIT ?'
+    )
+    assert fingerprint('SELECT "score_1" FROM "t"')[1] == (
+        'SELECT "score_1" FROM "t"'
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17SlowQueries:
+
+    def test_01_slow_queries_logged(self, admin_client, client, slow_log):
+        titles, _, _ = create_titles(admin_client)
+        slow_log.clear()
+        stats.reset()
+        for _ in range(2):
+            response = client.get(f'/api/v1/titles/{titles[0]["id"]}/reviews/')
+            assert response.status_code == 200
+        records = [json.loads(record.getMessage())
+                   for record in slow_log.records]
+        reviews = [
+            record for record in records
+            if 'FROM "reviews_review"' in record['sql']
+        ]
+        assert reviews, (
+            'Проверьте, что запросы дольше SLOW_QUERY_MS пишутся в журнал '
+            'api.slow_queries.'
+        )
+        record = reviews[0]
+        assert record['view'] == 'api.views.ReviewsViewSet.list', (
+            'Проверьте, что журнал медленных запросов содержит view.'
+        )
+        assert record['route'] == 'reviews-list'
+        assert any('reviews_review' in line for line in record['plan']), (
+            'Проверьте, что журнал медленных запросов содержит план запроса.'
+        )
+        assert len({record['fingerprint'] for record in reviews}) == 1
+
+        summary = {
+            entry['fingerprint']: entry for entry in stats.summary()
+        }
+        assert summary[record['fingerprint']]['count'] == 2, (
+            'Проверьте, что медленные запросы группируются по отпечатку.'
+        )
+
+    def test_02_report(self, capsys, tmp_path):
+        log = tmp_path / 'slow.log'
+        entry = {
+            'fingerprint': 'abc', 'query': 'SELECT ? FROM "t"',
+            'duration_ms': 300.0, 'view': 'api.views.TitlesViewSet.list',
+            'plan': ['SCAN t'], 'full_scans': ['t'],
+        }
+        log.write_text(
+            json.dumps(entry) + '\n' + json.dumps({'route': 'title-list'})
+            + '\n', encoding='utf-8'
+        )
+        (tmp_path / 'slow.log.1').write_text(
+            json.dumps({**entry, 'duration_ms': 500.0}) + '\nbroken\n',
+            encoding='utf-8'
+        )
+        call_command('slow_query_report', log=str(log))
+        output = capsys.readouterr().out
+        assert 'abc count=2 total_ms=800.0' in output, (
+            'Проверьте, что slow_query_report суммирует записи всех файлов '
+            'журнала по отпечатку.'
+        )
+        assert 'full scans: t' in output
+
+    def test_03_disabled_by_default(self, settings):
+        assert not settings.SLOW_QUERY_MS
+        assert (
+            'api.slow_queries.SlowQueryMiddleware' not in settings.MIDDLEWARE
+        ), 'Проверьте, что журнал медленных запросов включается только явно.'
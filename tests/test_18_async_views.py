@@ -0,0 +1,120 @@
+import asyncio
+import re
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, override_settings
+from django.urls import include, path, resolve
+
+from api.async_views import async_routes
+from api.metrics import DB_QUERIES, registry
+from api.urls import ASYNC_VIEWSETS, urlpatterns_auth, v1_router
+from tests.utils import create_comments
+
+urlpatterns = [
+    path('api/v1/', include(async_routes(v1_router.urls, ASYNC_VIEWSETS))),
+    path('api/v1/auth/', include(urlpatterns_auth)),
+]
+
+
+def async_get(url, **headers):
+    return async_request('get', url, **headers)
+
+
+def async_request(method, url, **kwargs):
+    async def send():
+        return await getattr(AsyncClient(), method)(url, **kwargs)
+    return async_to_sync(send)()
+
+
+def timed_queries(response):
+    found = re.search(r'desc="(\d+) queries"', response['Server-Timing'])
+    return int(found[1])
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18AsyncViews:
+
+    def test_01_async_reads_match_sync(self, admin_client, admin, client,
+                                       user, user_client):
+        author_map = {admin: admin_client, user: user_client}
+        comments, reviews, titles = create_comments(admin_client, author_map)
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        reviews_url = f'{title_url}reviews/'
+        comments_url = f'{reviews_url}{reviews[0]["id"]}/comments/'
+        urls = (
+            '/api/v1/categories/', '/api/v1/genres/', '/api/v1/titles/',
+            title_url, reviews_url, f'{reviews_url}{reviews[0]["id"]}/',
+            comments_url, f'{comments_url}{comments[0]["id"]}/',
+        )
+        expected = {url: client.get(url).json() for url in urls}
+
+        with override_settings(ROOT_URLCONF=__name__):
+            for url in urls:
+                assert asyncio.iscoroutinefunction(resolve(url).func), (
+                    f'Проверьте, что GET-запрос к `{url}` обрабатывает '
+                    'асинхронный view.'
+                )
+                response = async_get(url)
+                assert response.status_code == 200
+                assert response.json() == expected[url], (
+                    f'Проверьте, что асинхронный GET-запрос к `{url}` '
+                    'возвращает те же данные, что и синхронный.'
+                )
+            assert not asyncio.iscoroutinefunction(
+                resolve(f'{title_url}stats/').func
+            )
+
+            etag = async_get(title_url)['ETag']
+            response = async_get(title_url, **{'If-None-Match': etag})
+            assert response.status_code == 304
+
+    def test_02_async_writes_and_instrumentation(self, admin_client,
+                                                 settings):
+        settings.MIDDLEWARE = [
+            'api.timing.TimingMiddleware', *settings.MIDDLEWARE
+        ]
+        with override_settings(ROOT_URLCONF=__name__):
+            response = admin_client.post(
+                '/api/v1/categories/', data={'name': 'Фильм', 'slug': 'film'}
+            )
+            assert response.status_code == 201
+            response = async_get('/api/v1/categories/')
+        assert response.json()['results'] == [
+            {'name': 'Фильм', 'slug': 'film'}
+        ]
+        assert 'desc="0 queries"' not in response['Server-Timing'], (
+            'Проверьте, что запросы к базе из пула потоков учитываются '
+            'middleware текущего запроса.'
+        )
+
+    def test_03_sync_views_and_writes_instrumented(
+            self, settings, token_admin):
+        settings.MIDDLEWARE = [
+            'api.timing.TimingMiddleware', *settings.MIDDLEWARE
+        ]
+        auth = {'Authorization': f'Bearer {token_admin["access"]}'}
+        registry.reset()
+        with override_settings(ROOT_URLCONF=__name__):
+            response = async_request(
+                'post', '/api/v1/categories/',
+                data={'name': 'Фильм', 'slug': 'film'},
+                content_type='application/json', **auth
+            )
+            assert response.status_code == 201
+            assert timed_queries(response) > 0, (
+                'Проверьте, что запросы к базе при записи через асинхронный '
+                'view учитываются middleware текущего запроса.'
+            )
+            response = async_get('/api/v1/users/', **auth)
+            assert response.status_code == 200
+            assert timed_queries(response) > 0, (
+                'Проверьте, что запросы к базе синхронного view под ASGI '
+                'учитываются middleware текущего запроса.'
+            )
+        queries = registry.collect()[DB_QUERIES.name]
+        for route in ('category-list', 'users-list'):
+            assert queries[(route,)][-1] > 0, (
+                f'Проверьте, что MetricsMiddleware считает запросы к базе '
+                f'маршрута {route} под ASGI.'
+            )